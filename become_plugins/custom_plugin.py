@@ -72,6 +72,11 @@ DOCUMENTATION = """
 
 from ansible.plugins.become import BecomeBase
 
+# (exe, flags, password set, user) -> (password set, text before the prompt, text
+# after it), shared by every instance in a worker so repeated tasks with the
+# same settings skip the string building entirely
+_COMMAND_PARTS = {}
+
 
 class BecomeModule(BecomeBase):
 
@@ -81,24 +86,46 @@ class BecomeModule(BecomeBase):
     fail = ('Sorry, try again.',)
     missing = ('Sorry, a password is required to run custom_plugin', 'custom_plugin: a password is required')
 
+    def __init__(self):
+        super(BecomeModule, self).__init__()
+        self._command_parts = None
+
+    def set_options(self, task_keys=None, var_options=None, direct=None):
+        super(BecomeModule, self).set_options(task_keys=task_keys, var_options=var_options, direct=direct)
+        self._command_parts = None
+
+    def set_option(self, option, value):
+        super(BecomeModule, self).set_option(option, value)
+        self._command_parts = None
+
+    def _get_command_parts(self):
+        ''' resolve the options once per connection and precompute everything around the prompt '''
+        if self._command_parts is None:
+            key = (self.get_option('become_exe') or self.name,
+                   self.get_option('become_flags') or '',
+                   bool(self.get_option('become_pass')),
+                   self.get_option('become_user') or '')
+            parts = _COMMAND_PARTS.get(key)
+            if parts is None:
+                becomecmd, flags, has_pass, user = key
+                if has_pass and flags:  # this could be simplified, but kept as is for now for backwards string matching
+                    flags = flags.replace('-n', '')
+                if user:
+                    user = '-u %s' % (user)
+                parts = _COMMAND_PARTS[key] = (has_pass, '%s %s ' % (becomecmd, flags), ' %s ' % (user))
+            self._command_parts = parts
+        return self._command_parts
+
     def build_become_command(self, cmd, shell):
         super(BecomeModule, self).build_become_command(cmd, shell)
 
         if not cmd:
             return cmd
 
-        becomecmd = self.get_option('become_exe') or self.name
-
-        flags = self.get_option('become_flags') or ''
+        has_pass, head, tail = self._get_command_parts()
         prompt = ''
-        if self.get_option('become_pass'):
+        if has_pass:
             self.prompt = '[custom_plugin via ansible, key=%s] password:' % self._id
-            if flags:  # this could be simplified, but kept as is for now for backwards string matching
-                flags = flags.replace('-n', '')
             prompt = '-p "%s"' % (self.prompt)
 
-        user = self.get_option('become_user') or ''
-        if user:
-            user = '-u %s' % (user)
-
-        return ' '.join([becomecmd, flags, prompt, user, self._build_success_command(cmd, shell)])
+        return head + prompt + tail + self._build_success_command(cmd, shell)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    callback: benchmark_events
+    type: stdout
+    short_description: Counts callback events instead of displaying them
+    version_added: "2.8"
+    description:
+        - Near zero cost stdout callback used by utils/benchmark_runner.py as the baseline
+          that other stdout callbacks are compared against.
+        - Counts every event sent to the callback and prints a single summary line.
+        - Times every task and records the peak RSS of the controller process and of its
+          workers during that task alone, printing one line per task. The controller's peak
+          is reset when the task starts and read back when it ends; the workers are sampled
+          from /proc while it runs. Both are null where there is no /proc.
+        - Measures the size of the set_stats artifacts and how long they take to serialise,
+          which is what handing them over to a workflow costs.
+        - When BENCHMARK_EVENTS_FILE is set, writes the count, the elapsed time, the per-task
+          timings and the host stats there as JSON at the end of the playbook.
+        - The custom stats themselves are left out of that file when they serialise to more than
+          BENCHMARK_MAX_CUSTOM_STATS_BYTES, so large artifacts are only measured, not copied.
+'''
+
+import json
+import os
+import threading
+import time
+
+from ansible.plugins.callback import CallbackBase
+
+
+# Seconds between samples of the workers' RSS while a task runs
+SAMPLE_INTERVAL = 0.05
+
+
+def _status_kb(pid, field):
+    """Return a kB field such as VmRSS from /proc/<pid>/status, or None."""
+    try:
+        with open('/proc/{}/status'.format(pid)) as f:
+            for line in f:
+                if line.startswith(field + ':'):
+                    return int(line.split()[1])
+    except (IOError, OSError, ValueError):
+        pass
+    return None
+
+
+def _children(pid):
+    """Return the pids whose parent is ``pid``; the workers are the controller's children."""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open('/proc/{}/stat'.format(entry)) as f:
+                # the command name may hold spaces and parentheses, the fields after it do not
+                if int(f.read().rpartition(')')[2].split()[1]) == pid:
+                    children.append(entry)
+        except (IOError, OSError, ValueError, IndexError):
+            pass
+    return children
+
+
+def _reset_peak_rss():
+    """Reset this process's VmHWM to its current RSS, returning whether that worked (Linux 4.0+)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except (IOError, OSError):
+        return False
+
+
+class CallbackModule(CallbackBase):
+
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'stdout'
+    CALLBACK_NAME = 'benchmark_events'
+
+    def __init__(self):
+        super(CallbackModule, self).__init__()
+        self.events = 0
+        self.started = time.time()
+        self.tasks = []
+        self._current = None
+        self._inventory = None
+        self._procfs = os.path.isdir('/proc/self')
+        self._peak_reset = False
+        self._workers_peak = self._workers_total_peak = None
+        self._stop = threading.Event()
+        self._sampler = None
+
+    def _sample_workers(self):
+        pid = os.getpid()
+        while not self._stop.wait(SAMPLE_INTERVAL):
+            if self._current is None:
+                continue
+            rss = [kb for kb in (_status_kb(child, 'VmRSS') for child in _children(pid)) if kb is not None]
+            if rss:
+                self._workers_peak = max(self._workers_peak or 0, max(rss))
+                self._workers_total_peak = max(self._workers_total_peak or 0, sum(rss))
+
+    def _start_task(self, name):
+        self._finish_task()
+        if self._procfs and self._sampler is None:
+            self._sampler = threading.Thread(target=self._sample_workers, name='benchmark_events_rss')
+            self._sampler.daemon = True
+            self._sampler.start()
+        self._peak_reset = self._procfs and _reset_peak_rss()
+        self._workers_peak = self._workers_total_peak = 0 if self._procfs else None
+        self._current = (name, time.time())
+
+    def _finish_task(self):
+        if self._current is None:
+            return
+        name, started = self._current
+        self._current = None
+        # workers are reaped as soon as they finish, so the samples only see the ones still running
+        timing = {'name': name,
+                  'seconds': round(time.time() - started, 4),
+                  'controller_peak_rss_kb': _status_kb('self', 'VmHWM') if self._peak_reset else None,
+                  'workers_peak_rss_kb': self._workers_peak,
+                  'workers_total_peak_rss_kb': self._workers_total_peak}
+        self.tasks.append(timing)
+        self._display.display('benchmark_events: %s %.3fs controller_peak_rss=%sKB workers_peak_rss=%sKB '
+                              'workers_total_peak_rss=%sKB' % (name, timing['seconds'],
+                                                               timing['controller_peak_rss_kb'],
+                                                               timing['workers_peak_rss_kb'],
+                                                               timing['workers_total_peak_rss_kb']))
+
+    def v2_on_any(self, *args, **kwargs):
+        self.events += 1
+
+    def v2_playbook_on_task_start(self, task, is_conditional):
+        self._start_task(task.get_name().strip())
+
+    def v2_playbook_on_handler_task_start(self, task):
+        self.v2_playbook_on_task_start(task, False)
+
+    def v2_playbook_on_play_start(self, play):
+        self._finish_task()
+        self._inventory = play.get_variable_manager()._inventory
+
+    def v2_playbook_on_stats(self, stats):
+        # the stats event itself is counted by v2_on_any after this returns
+        self._finish_task()
+        self._stop.set()
+        elapsed = time.time() - self.started
+        summary = dict((host, stats.summarize(host)) for host in sorted(stats.processed))
+        # the implicit localhost of a summary play is never added to inventory.hosts
+        hosts = [host for host in stats.processed if self._inventory is None or host in self._inventory.hosts]
+        dump_started = time.time()
+        artifacts = json.dumps(stats.custom)
+        dump_seconds = time.time() - dump_started
+        self._display.display('benchmark_events: %d events in %.3fs, %d bytes of custom stats' %
+                              (self.events, elapsed, len(artifacts)))
+        path = os.environ.get('BENCHMARK_EVENTS_FILE')
+        limit = os.environ.get('BENCHMARK_MAX_CUSTOM_STATS_BYTES')
+        if path:
+            with open(path, 'w') as f:
+                json.dump({'events': self.events, 'seconds': elapsed, 'hosts': len(hosts),
+                           'tasks': self.tasks, 'stats': summary,
+                           'custom_stats': stats.custom if limit is None or len(artifacts) <= int(limit) else None,
+                           'custom_stats_bytes': len(artifacts),
+                           'custom_stats_dump_seconds': round(dump_seconds, 4)}, f)
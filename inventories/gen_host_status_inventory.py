@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+# Scaled-up for_gen_host_status.ini: SCALE_INVENTORY_HOSTS hosts named
+# <index>_<status>, spread over the outcomes in HOST_STATUS_MIX, e.g.:
+#   SCALE_INVENTORY_HOSTS=20000 HOST_STATUS_MIX=ok=90,changed=5,failed=3,unreachable=2 ./gen_host_status_inventory.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'utils'))
+from inventory_generator import load_host_status_inventory  # noqa: E402
+
+
+if __name__ == '__main__':
+    load_host_status_inventory()
@@ -1,54 +1,14 @@
 #!/usr/bin/env python
-from argparse import ArgumentParser
-from pprint import pprint
-import json
+import os
+import sys
 
-inventory = {'group_one': {'hosts': ['group_one_host_0{}'.format(i) for i in range(1, 6)]
-                                    + ['group_one_and_two_host_0{}'.format(i) for i in range(1, 6)]
-                                    + ['group_one_two_and_three_host_0{}'.format(i) for i in range(1, 6)],
-                           'vars': {'is_in_group_one': True,
-                                    'complex_var': [{"dir": "/opt/gwaf/logs",
-                                                     "sourcetype": "gwaf",
-                                                     "something_else": [1, 2, 3]}]}},
-             'group_two': {'hosts': ['group_two_host_0{}'.format(i) for i in range(1, 6)]
-                                    + ['group_one_and_two_host_0{}'.format(i) for i in range(1, 6)]
-                                    + ['group_two_and_three_host_0{}'.format(i) for i in range(1, 6)]
-                                    + ['group_one_two_and_three_host_0{}'.format(i) for i in range(1, 6)],
-                           'vars': {'is_in_group_two': True}},
-             'group_three': {'hosts': ['group_three_host_0{}'.format(i) for i in range(1, 6)]
-                                    + ['group_two_and_three_host_0{}'.format(i) for i in range(1, 6)]
-                                    + ['group_one_two_and_three_host_0{}'.format(i) for i in range(1, 6)],
-                             'vars': {'is_in_group_three': True}},
-             'all': {'vars': {'ansible_connection': 'local',
-                              'inventories_var': True}},
-             'ungrouped': {'hosts': ['ungrouped_host_0{}'.format(i) for i in range(1, 6)]}}
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'utils'))
+from inventory_generator import load_inventory  # noqa: E402
 
-hostvars = {'group_one_host_01': {'group_one_host_01_has_this_var': True},
-            'group_two_host_01': {'group_two_host_01_has_this_var': True},
-            'group_three_host_01': {'group_three_host_01_has_this_var': True}}
-
-
-def dumps(dct):
-    return json.dumps(dct, sort_keys=True, indent=4, separators=(',', ': '))
-
-
-def parse_args():
-    parser = ArgumentParser()
-    parser.add_argument('--list', dest='list_instances', action='store_true', default=True,
-                        help='List instances (default: True)')
-    parser.add_argument('--host', dest='requested_host', help='Get all the variables about a specific instance')
-    return parser.parse_args()
-
-
-def load_inventory():
-    args = parse_args()
-    if args.requested_host:
-        print(dumps(hostvars.get(args.requested_host, {})))
-    elif args.list_instances:
-        print(dumps(inventory))
-    else:
-        print({})
+group_vars = {'one': {'complex_var': [{"dir": "/opt/gwaf/logs",
+                                       "sourcetype": "gwaf",
+                                       "something_else": [1, 2, 3]}]}}
 
 
 if __name__ == '__main__':
-    load_inventory()
+    load_inventory(('one', 'two', 'three'), group_vars=group_vars, meta=False)
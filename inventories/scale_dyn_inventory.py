@@ -0,0 +1,13 @@
+#!/usr/bin/env python
+# Parametric large-scale inventory, streamed as JSON.  Size it with the
+# SCALE_INVENTORY_* env vars (or the matching flags), e.g.:
+#   SCALE_INVENTORY_HOSTS=50000 SCALE_INVENTORY_GROUPS=2000 SCALE_INVENTORY_OVERLAP=0.3 ./scale_dyn_inventory.py
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'utils'))
+from inventory_generator import load_scale_inventory  # noqa: E402
+
+
+if __name__ == '__main__':
+    load_scale_inventory()
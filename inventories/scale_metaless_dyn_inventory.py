@@ -0,0 +1,14 @@
+#!/usr/bin/env python
+# Metaless variant of scale_dyn_inventory.py: --list has no _meta, so Ansible
+# calls --host once per host.  Each of those calls is a binary search in a
+# memory-mapped hostvar index built on the first run for the given
+# SCALE_INVENTORY_HOSTS / SCALE_INVENTORY_HOSTVAR_BYTES.
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'utils'))
+from inventory_generator import load_scale_inventory  # noqa: E402
+
+
+if __name__ == '__main__':
+    load_scale_inventory(meta=False)
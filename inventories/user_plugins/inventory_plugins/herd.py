@@ -0,0 +1,136 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+    inventory: herd
+    version_added: "2.8"
+    short_description: Generates a large herd of cows, cached between runs
+    description:
+        - Generates C(host_count) hosts spread round-robin over C(group_count) groups,
+          each host carrying C(vars_per_host) hostvars
+        - The generated herd is stored through the inventory cache plugin interface, so with
+          C(cache) enabled a run inside C(cache_timeout) reads it back instead of regenerating it
+        - Changing any generation option changes the cache key, so a stale herd is never reused
+        - Sets C(herd_cache_hit) and C(herd_generated_at) on the all group so a sync can tell
+          whether regeneration was skipped
+        - Generating the herd is cheap and adding it to the inventory costs the same on a cache hit,
+          so the gap between cold and warm runs is simulated with C(delay_per_thousand)
+    extends_documentation_fragment:
+        - inventory_cache
+    options:
+        plugin:
+            description: token that ensures this is a source file for the 'herd' plugin.
+            required: True
+            choices: ['herd']
+        host_count:
+            description: Number of hosts to generate
+            type: int
+            default: 1000
+        group_count:
+            description: Number of groups the hosts are spread over
+            type: int
+            default: 10
+        vars_per_host:
+            description: Number of hostvars set on every host
+            type: int
+            default: 5
+        delay_per_thousand:
+            description:
+                - Seconds to sleep for every 1000 hosts generated
+                - Stands in for a slow upstream API, the only thing a cache hit saves; set it to 0 to
+                  time adding the hosts alone
+            type: float
+            default: 0.5
+'''
+
+EXAMPLES = r'''
+    # herd.yaml
+    plugin: herd
+    host_count: 20000
+    group_count: 200
+    cache: true
+    cache_plugin: jsonfile
+    cache_connection: /tmp/herd_inventory_cache
+    cache_timeout: 3600
+'''
+
+import hashlib
+import json
+import time
+
+from ansible.errors import AnsibleParserError
+from ansible.plugins.inventory import BaseInventoryPlugin, Cacheable
+
+
+class InventoryModule(BaseInventoryPlugin, Cacheable):
+
+    NAME = 'herd'
+
+    GENERATION_OPTIONS = ('host_count', 'group_count', 'vars_per_host')
+
+    def verify_file(self, path):
+        ''' only yaml files named like herd.yaml are herd sources '''
+        return super(InventoryModule, self).verify_file(path) and path.endswith(('herd.yaml', 'herd.yml'))
+
+    def _generation_options(self):
+        return dict((name, self.get_option(name)) for name in self.GENERATION_OPTIONS)
+
+    def _herd_cache_key(self, path):
+        options = json.dumps(self._generation_options(), sort_keys=True).encode('utf-8')
+        return '{0}_{1}'.format(self.get_cache_key(path), hashlib.sha1(options).hexdigest()[:12])
+
+    def _generate(self):
+        ''' build the herd as plain data, so it can be stored by any cache plugin '''
+        host_count = self.get_option('host_count')
+        group_count = self.get_option('group_count')
+        vars_per_host = self.get_option('vars_per_host')
+        delay = self.get_option('delay_per_thousand')
+        if host_count < 0 or group_count < 1 or vars_per_host < 0:
+            raise AnsibleParserError('herd needs a non-negative host_count and vars_per_host and a positive group_count')
+
+        groups = dict(('herd_{0:04d}'.format(g), []) for g in range(group_count))
+        group_names = sorted(groups)
+        hostvars = {}
+        for i in range(host_count):
+            if delay and i % 1000 == 0:
+                time.sleep(delay)
+            host = 'cow_{0:06d}'.format(i)
+            groups[group_names[i % group_count]].append(host)
+            hostvars[host] = dict(('moo_{0}'.format(v), 'm' + 'o' * (v + 1)) for v in range(vars_per_host))
+        return {'groups': groups, 'hostvars': hostvars, 'generated_at': time.time()}
+
+    def _populate(self, herd, cache_hit):
+        self.inventory.set_variable('all', 'herd_cache_hit', cache_hit)
+        self.inventory.set_variable('all', 'herd_generated_at', herd['generated_at'])
+        for group, hosts in herd['groups'].items():
+            self.inventory.add_group(group)
+            for host in hosts:
+                self.inventory.add_host(host, group=group)
+                for name, value in herd['hostvars'][host].items():
+                    self.inventory.set_variable(host, name, value)
+
+    def parse(self, inventory, loader, path, cache=True):
+        ''' generates the herd, or reads it back from the inventory cache '''
+        super(InventoryModule, self).parse(inventory, loader, path)
+        self._read_config_data(path)
+        cache_key = self._herd_cache_key(path)
+
+        # cache is False when the user asked to flush it (e.g. --flush-cache)
+        user_cache_setting = self.get_option('cache')
+        attempt_to_read_cache = user_cache_setting and cache
+        cache_needs_update = user_cache_setting and not cache
+
+        herd = None
+        if attempt_to_read_cache:
+            try:
+                herd = self._cache[cache_key]
+            except KeyError:
+                cache_needs_update = True
+
+        cache_hit = herd is not None
+        if not cache_hit:
+            herd = self._generate()
+        if cache_needs_update:
+            self._cache[cache_key] = herd
+
+        self._populate(herd, cache_hit)
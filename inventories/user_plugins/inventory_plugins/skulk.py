@@ -0,0 +1,152 @@
+from __future__ import (absolute_import, division, print_function)
+__metaclass__ = type
+
+DOCUMENTATION = r'''
+    inventory: skulk
+    version_added: "2.8"
+    short_description: Adds a skulk of foxes in batches, then fails on purpose
+    description:
+        - Bulk version of the fox plugin, for measuring how rollback cost grows with the amount already imported
+        - Adds C(host_count) hosts spread over C(group_count) groups in batches of C(batch_size),
+          setting C(vars_per_host) hostvars on each
+        - Fails after C(fail_at_percent) percent of the hosts, or at the start of batch C(fail_at_batch);
+          with C(fail_mid_vars) the failure happens halfway through writing the vars of that host,
+          which needs a positive C(vars_per_host)
+        - With neither failure option set the import succeeds, which gives the no-rollback baseline
+        - Time spent on each batch is shown at -v and written to C(timing_file) when set, even on failure,
+          in which case the last entry is the partial batch the failure happened in
+    options:
+        plugin:
+            description: token that ensures this is a source file for the 'skulk' plugin.
+            required: True
+            choices: ['skulk']
+        host_count:
+            description: Number of hosts to add
+            type: int
+            default: 10000
+        group_count:
+            description: Number of groups the hosts are spread over
+            type: int
+            default: 100
+        vars_per_host:
+            description: Number of hostvars set on every host
+            type: int
+            default: 5
+        batch_size:
+            description: Number of hosts added per batch
+            type: int
+            default: 1000
+        fail_at_percent:
+            description: Fail once this percentage of the hosts has been added
+            type: float
+        fail_at_batch:
+            description: Fail at the start of this (zero based) batch
+            type: int
+        fail_mid_vars:
+            description: Fail while writing the vars of the failing host instead of before adding it
+            type: bool
+            default: False
+        timing_file:
+            description: Path to write the per-batch timings to, as JSON
+            type: path
+'''
+
+EXAMPLES = r'''
+    # skulk.yaml
+    plugin: skulk
+    host_count: 50000
+    batch_size: 5000
+    fail_at_percent: 90
+    timing_file: /tmp/skulk_timings.json
+'''
+
+import json
+import time
+
+from ansible.errors import AnsibleParserError
+from ansible.plugins.inventory import BaseInventoryPlugin
+from ansible.utils.display import Display
+
+display = Display()
+
+
+class InventoryModule(BaseInventoryPlugin):
+
+    NAME = 'skulk'
+
+    def verify_file(self, path):
+        ''' only yaml files named like skulk.yaml are skulk sources '''
+        return super(InventoryModule, self).verify_file(path) and path.endswith(('skulk.yaml', 'skulk.yml'))
+
+    def _failure_index(self, host_count, batch_size, vars_per_host):
+        ''' index of the host the import fails at, or None to let it succeed '''
+        percent = self.get_option('fail_at_percent')
+        batch = self.get_option('fail_at_batch')
+        if percent is not None and batch is not None:
+            raise AnsibleParserError('skulk accepts only one of fail_at_percent and fail_at_batch')
+        if self.get_option('fail_mid_vars') and vars_per_host < 1:
+            raise AnsibleParserError('skulk needs a positive vars_per_host to fail in the middle of them')
+        if percent is not None:
+            return int(host_count * percent / 100)
+        if batch is not None:
+            return batch * batch_size
+        return None
+
+    def _report(self, timings, outcome):
+        for timing in timings:
+            display.v('skulk batch {batch}: {hosts} hosts in {seconds:.3f}s ({added} added so far)'.format(**timing))
+        timing_file = self.get_option('timing_file')
+        if timing_file:
+            with open(timing_file, 'w') as f:
+                json.dump({'outcome': outcome, 'batches': timings}, f, indent=2)
+
+    def _fail(self, timings, host_index, reason, partial=None):
+        ''' raise, after recording the timings including the partial batch the failure happened in '''
+        completed = len(timings)
+        if partial is not None:
+            timings.append(partial)
+        self._report(timings, 'failed')
+        raise AnsibleParserError('skulk failed on purpose {0} host {1}, after {2} batches'.format(
+            reason, host_index, completed))
+
+    def parse(self, inventory, loader, path, cache=True):
+        ''' adds the hosts batch by batch, failing wherever it was told to '''
+        super(InventoryModule, self).parse(inventory, loader, path)
+        self._read_config_data(path)
+        host_count = self.get_option('host_count')
+        group_count = self.get_option('group_count')
+        vars_per_host = self.get_option('vars_per_host')
+        batch_size = self.get_option('batch_size')
+        fail_mid_vars = self.get_option('fail_mid_vars')
+        if host_count < 0 or group_count < 1 or vars_per_host < 0 or batch_size < 1:
+            raise AnsibleParserError('skulk needs non-negative host_count and vars_per_host '
+                                     'and positive group_count and batch_size')
+        fail_index = self._failure_index(host_count, batch_size, vars_per_host)
+
+        groups = ['skulk_{0:04d}'.format(g) for g in range(group_count)]
+        for group in groups:
+            self.inventory.add_group(group)
+
+        timings = []
+        for batch, start in enumerate(range(0, host_count, batch_size)):
+            started = time.time()
+            end = min(start + batch_size, host_count)
+            for i in range(start, end):
+                if i == fail_index and not fail_mid_vars:
+                    self._fail(timings, i, 'before adding', {'batch': batch, 'hosts': i - start, 'added': i,
+                                                             'seconds': time.time() - started, 'partial': True})
+                host = 'fox_{0:06d}'.format(i)
+                self.inventory.add_host(host, group=groups[i % group_count])
+                for v in range(vars_per_host):
+                    if i == fail_index and v == vars_per_host // 2:
+                        # the failing host is in the inventory already, only its vars are incomplete
+                        self._fail(timings, i, 'while writing the vars of',
+                                   {'batch': batch, 'hosts': i + 1 - start, 'added': i + 1,
+                                    'seconds': time.time() - started, 'partial': True})
+                    self.inventory.set_variable(host, 'what_does_the_fox_say_{0}'.format(v), 'ding' * (v + 1))
+            timings.append({'batch': batch, 'hosts': end - start, 'added': end,
+                            'seconds': time.time() - started})
+
+        if fail_index is not None:
+            self._fail(timings, host_count, 'after adding')
+        self._report(timings, 'succeeded')
@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import time
+
+from ansible.module_utils.basic import AnsibleModule
+
+DOCUMENTATION = '''
+---
+module: async_status_batch
+short_description: Wait for many async jobs with one module call.
+description:
+    - Batched counterpart of async_status. Polls the job files of every jid in a single
+      module invocation, every C(poll_interval) seconds, until all of them have finished
+      or C(timeout) runs out.
+    - Used by async_benchmark.yml to compare one polling loop per job with one batched wait.
+version_added: "2.3"
+options:
+    jids:
+        description: Job ids returned by tasks run with C(poll: 0).
+        required: true
+    async_dir:
+        description: Directory the async job files are written to; must match the C(async_dir) shell option.
+        default: ~/.ansible_async
+    poll_interval:
+        description: Seconds to sleep between polling rounds.
+        default: 1.0
+    timeout:
+        description: Seconds to wait for all jobs before failing.
+        default: 600
+    cleanup:
+        description: Remove the job files of finished jobs.
+        default: true
+requirements: []
+author: Ansible QE
+'''
+
+EXAMPLES = '''
+- command: sleep 5
+  loop: "{{ range(100) | list }}"
+  async: 60
+  poll: 0
+  register: fired
+
+- async_status_batch:
+    jids: "{{ fired.results | map(attribute='ansible_job_id') | list }}"
+    poll_interval: 0.5
+'''
+
+
+def read_job(path):
+    ''' return the job result, or None while the job is still running or has not started '''
+    try:
+        with open(path) as f:
+            data = json.loads(f.read())
+    except (IOError, OSError, ValueError):
+        return None  # not started, or the result is still being written
+    # same test as async_status: the wrapper writes {"started": 1, "finished": 0} while the job runs,
+    # and the module's own result, without "started", once it is done
+    if 'started' in data and not data.get('finished'):
+        return None
+    return data
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(jids=dict(type='list', required=True),
+                           async_dir=dict(type='path', default='~/.ansible_async'),
+                           poll_interval=dict(type='float', default=1.0),
+                           timeout=dict(type='float', default=600),
+                           cleanup=dict(type='bool', default=True)))
+    async_dir = os.path.expanduser(module.params['async_dir'])
+    interval = module.params['poll_interval']
+
+    started = time.time()
+    deadline = started + module.params['timeout']
+    pending = dict((jid, os.path.join(async_dir, jid)) for jid in module.params['jids'])
+    failed = []
+    rounds = 0
+    checks = 0
+    while pending:
+        rounds += 1
+        for jid, path in list(pending.items()):
+            checks += 1
+            data = read_job(path)
+            if data is None:
+                continue
+            del pending[jid]
+            if data.get('failed') or data.get('rc', 0) != 0:
+                failed.append(jid)
+            if module.params['cleanup']:
+                os.remove(path)
+        if not pending or time.time() + interval > deadline:
+            break
+        time.sleep(interval)
+
+    result = dict(changed=False, jobs=len(module.params['jids']), failed_jids=failed, pending_jids=sorted(pending),
+                  rounds=rounds, checks=checks, elapsed=time.time() - started)
+    if pending:
+        module.fail_json(msg='%d of %d jobs still running after %ss' % (len(pending), result['jobs'],
+                                                                       module.params['timeout']), **result)
+    if failed:
+        module.fail_json(msg='%d of %d jobs failed' % (len(failed), result['jobs']), **result)
+    module.exit_json(**result)
+
+
+if __name__ == '__main__':
+    main()
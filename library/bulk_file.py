@@ -0,0 +1,71 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+import os
+import shutil
+
+from ansible.module_utils.basic import AnsibleModule
+
+DOCUMENTATION = '''
+---
+module: bulk_file
+short_description: Create or remove many directories in one module call.
+description:
+    - Batched counterpart of the file module for a list of paths, used by
+      file_benchmark.yml to compare one call per path with one call per batch.
+    - Only supports directories and removal, which is all the benchmark needs.
+version_added: "2.3"
+options:
+    paths:
+        description: Paths to manage.
+        required: true
+    state:
+        description: Whether the paths should be directories or be absent.
+        choices: [directory, absent]
+        default: directory
+    mode:
+        description: Permissions of created directories, as an octal string.
+        default: "0700"
+requirements: []
+author: Ansible QE
+'''
+
+EXAMPLES = '''
+- bulk_file:
+    paths: "{{ paths }}"
+    state: directory
+    mode: "0700"
+'''
+
+
+def main():
+    module = AnsibleModule(
+        argument_spec=dict(paths=dict(type='list', required=True),
+                           state=dict(default='directory', choices=['directory', 'absent']),
+                           mode=dict(type='str', default='0700')))
+    try:
+        mode = int(module.params['mode'], 8)
+    except ValueError:
+        module.fail_json(msg='mode must be an octal string, got %s' % module.params['mode'])
+
+    changed = 0
+    for path in module.params['paths']:
+        if module.params['state'] == 'absent':
+            if os.path.isdir(path) and not os.path.islink(path):
+                shutil.rmtree(path)
+                changed += 1
+            elif os.path.lexists(path):
+                os.remove(path)
+                changed += 1
+            continue
+        if not os.path.isdir(path):
+            os.makedirs(path)
+            changed += 1
+        if os.stat(path).st_mode & 0o7777 != mode:
+            os.chmod(path, mode)
+            changed += 1
+    module.exit_json(changed=bool(changed), paths=len(module.params['paths']), changed_paths=changed)
+
+
+if __name__ == '__main__':
+    main()
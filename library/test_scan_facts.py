@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 
 import os
+import random
 
 from ansible.module_utils.basic import * # noqa
 
@@ -11,8 +12,39 @@ module: scan_facts
 short_description: Return sample facts into facts namespace.
 description:
     - Return sample facts into facts namespace.
+    - Optionally adds C(fact_count) generated facts named C(scan_fact_NNNNN), built
+      deterministically from C(seed) so the payload is the same on every run.
+    - C(delta_percent) and C(generation) make successive runs differ in only part of
+      the generated facts, for comparing incremental fact cache updates with full rewrites.
 version_added: "2.3"
 options:
+    fact_count:
+        description: Number of generated facts to add to the sample facts.
+        default: 0
+    nesting_depth:
+        description: Number of nested objects wrapped around each generated value.
+        default: 0
+    string_size:
+        description: Length of each generated string.
+        default: 16
+    unicode_ratio:
+        description: Fraction, 0.0 to 1.0, of generated strings made of non-ASCII characters.
+        default: 0.0
+    numeric_ratio:
+        description: Fraction, 0.0 to 1.0, of generated values that are numbers instead of strings.
+        default: 0.0
+    seed:
+        description: Seed every generated value is derived from.
+        default: scan_facts
+    delta_percent:
+        description:
+            - Percentage of generated facts that change from one generation to the next.
+            - The changed facts rotate through the whole set, so generation N and N+1 always
+              differ in exactly that many facts.
+        default: 0.0
+    generation:
+        description: Which generation of the facts to return; only matters with C(delta_percent).
+        default: 0
 requirements: []
 author: Chris Meyers, Christopher Wang
 '''
@@ -42,11 +74,84 @@ EXAMPLES = '''
     },
     "changed": false
 }
+
+# 10k facts per host, 20% of them changed since the previous generation:
+- test_scan_facts:
+    fact_count: 10000
+    nesting_depth: 2
+    string_size: 64
+    unicode_ratio: 0.1
+    numeric_ratio: 0.3
+    delta_percent: 20
+    generation: "{{ run_number }}"
 '''
 
+UNICODE_RANGE = (0x4e00, 0x9fff)
+
+try:
+    unichr
+except NameError:
+    unichr = chr
+
+
+def last_changed(index, count, changed_per_generation, generation):
+    ''' generation in which fact ``index`` last changed, or 0 if it never has
+
+    Generation g changes the changed_per_generation facts that follow the ones
+    changed by generation g - 1, wrapping around the whole set.
+    '''
+    if not changed_per_generation:
+        return 0
+    last_position = generation * changed_per_generation - 1
+    if last_position < index:
+        return 0
+    position = index + count * ((last_position - index) // count)
+    return position // changed_per_generation + 1
+
+
+def generated_facts(count, depth, string_size, unicode_ratio, numeric_ratio, seed, delta_percent, generation):
+    pool_rng = random.Random(seed)
+    pool_size = 4096 + string_size
+    ascii_pool = ''.join(pool_rng.choice('abcdefghijklmnopqrstuvwxyz0123456789') for i in range(pool_size))
+    unicode_pool = u''.join(unichr(pool_rng.randint(*UNICODE_RANGE)) for i in range(pool_size))
+    changed_per_generation = int(round(count * delta_percent / 100.0))
+
+    facts = {}
+    for index in range(count):
+        version = last_changed(index, count, changed_per_generation, generation)
+        rng = random.Random('%s:%d:%d' % (seed, index, version))
+        kind = rng.random()
+        if kind < numeric_ratio:
+            value = rng.randint(0, 2 ** 31) if rng.random() < 0.5 else rng.uniform(0, 2 ** 31)
+        else:
+            pool = unicode_pool if rng.random() < unicode_ratio else ascii_pool
+            offset = rng.randint(0, pool_size - string_size)
+            value = pool[offset:offset + string_size]
+        for level in range(depth, 0, -1):
+            value = {'level_%d' % level: value}
+        facts['scan_fact_%05d' % index] = value
+    return facts
+
+
 def main():
     module = AnsibleModule(
-        argument_spec = dict())
+        argument_spec = dict(fact_count=dict(type='int', default=0),
+                             nesting_depth=dict(type='int', default=0),
+                             string_size=dict(type='int', default=16),
+                             unicode_ratio=dict(type='float', default=0.0),
+                             numeric_ratio=dict(type='float', default=0.0),
+                             seed=dict(type='str', default='scan_facts'),
+                             delta_percent=dict(type='float', default=0.0),
+                             generation=dict(type='int', default=0)))
+    params = module.params
+    for name in ('fact_count', 'nesting_depth', 'string_size', 'generation'):
+        if params[name] < 0:
+            module.fail_json(msg='%s must not be negative' % name)
+    for name in ('unicode_ratio', 'numeric_ratio'):
+        if not 0.0 <= params[name] <= 1.0:
+            module.fail_json(msg='%s must be between 0.0 and 1.0' % name)
+    if not 0.0 <= params['delta_percent'] <= 100.0:
+        module.fail_json(msg='delta_percent must be between 0 and 100')
 
     string="abc"
     unicode_string="鵟犭酜귃ꔀꈛ竳䙭韽ࠔ"
@@ -67,6 +172,11 @@ def main():
 
     results = dict(ansible_facts=dict(string=string, unicode_string=unicode_string, int=int, float=float, bool=bool,
                                       null=null, list=list, obj=obj, empty_list=empty_list, empty_obj=empty_obj))
+    if params['fact_count']:
+        results['ansible_facts'].update(generated_facts(params['fact_count'], params['nesting_depth'],
+                                                        params['string_size'], params['unicode_ratio'],
+                                                        params['numeric_ratio'], params['seed'],
+                                                        params['delta_percent'], params['generation']))
     module.exit_json(**results)
 
 main()
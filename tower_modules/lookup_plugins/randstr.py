@@ -6,15 +6,40 @@ DOCUMENTATION = """
     lookup: randstr
     author: Chris Meyers <cmeyers@redhat.com>
     version_added: "0.1"
-    short_description: generate random string
+    short_description: generate random strings
     description:
-        - This lookup returns a random string.
+        - This lookup returns random lowercase strings.
+        - With no terms it returns a single 12 character string.
+        - Terms of the form C(count=N), C(length=N) and C(unique=yes), or the matching keyword
+          arguments, return many strings from one call; use C(query) to get them as a list.
+        - All strings in a call are cut from one C(os.urandom) buffer.
+    options:
+      count:
+        description: Number of strings to return
+        default: 1
+      length:
+        description: Length of each string
+        default: 12
+      unique:
+        description: Guarantee that no two returned strings are equal
+        default: False
+"""
+
+EXAMPLES = """
+- name: one random name
+  debug:
+    msg: "inv-for-group-{{ lookup('randstr') }}"
+
+- name: 100000 unique 16 character names in a single call
+  set_fact:
+    names: "{{ query('randstr', 'count=100000', 'length=16', 'unique=yes') }}"
 """
 from ansible.errors import AnsibleError, AnsibleParserError
+from ansible.module_utils.parsing.convert_bool import boolean
 from ansible.plugins.lookup import LookupBase
 
+import os
 import string
-import random
 
 try:
     from __main__ import display
@@ -22,8 +47,71 @@ except ImportError:
     from ansible.utils.display import Display
     display = Display()
 
+ALPHABET = string.ascii_lowercase.encode('ascii')
+# Largest multiple of len(ALPHABET) that fits in a byte; bytes at or above it are
+# dropped so every letter stays equally likely
+LIMIT = 256 - 256 % len(ALPHABET)
+TABLE = bytes(bytearray(ALPHABET[b % len(ALPHABET)] if b < LIMIT else 0 for b in range(256)))
+REJECTED = bytes(bytearray(range(LIMIT, 256)))
+
+
+def random_letters(size):
+    """Return ``size`` random lowercase letters, translated from urandom bytes in one pass."""
+    letters = b''
+    while len(letters) < size:
+        missing = size - len(letters)
+        # over-read by the expected rejection rate, plus a little, so one pass is almost always enough
+        letters += os.urandom(missing * 256 // LIMIT + 16).translate(TABLE, REJECTED)
+    return letters[:size].decode('ascii')
+
+
+def random_strings(count, length):
+    letters = random_letters(count * length)
+    return [letters[i:i + length] for i in range(0, count * length, length)]
+
 
 class LookupModule(LookupBase):
 
+    def _parse_terms(self, terms, kwargs):
+        options = {'count': 1, 'length': 12, 'unique': False}
+        for term in terms:
+            name, sep, value = str(term).partition('=')
+            if not sep or name not in options:
+                raise AnsibleParserError("randstr terms must be one of count=, length= or unique=, got '%s'" % term)
+            options[name] = value
+        for name, value in kwargs.items():
+            if name not in options:
+                raise AnsibleParserError("unknown randstr option '%s'" % name)
+            options[name] = value
+        try:
+            count = int(options['count'])
+            length = int(options['length'])
+        except ValueError:
+            raise AnsibleParserError('randstr count and length must be integers')
+        if count < 0 or length < 1:
+            raise AnsibleParserError('randstr count must be non-negative and length positive')
+        try:
+            unique = boolean(options['unique'])
+        except TypeError:
+            raise AnsibleParserError("randstr unique must be a boolean, got '%s'" % options['unique'])
+        return count, length, unique
+
     def run(self, terms, variables=None, **kwargs):
-        return [''.join(random.choice(string.ascii_lowercase) for i in range(12))]
+        count, length, unique = self._parse_terms(terms, kwargs)
+        strings = random_strings(count, length)
+        if not unique:
+            return strings
+
+        if count > len(ALPHABET) ** length:
+            raise AnsibleError('cannot make %d unique strings of length %d' % (count, length))
+        seen = set(strings)
+        if len(seen) < count:
+            # only the duplicates are replaced, so the result stays one batch in the common case
+            result = list(seen)
+            while len(result) < count:
+                for candidate in random_strings(count - len(result), length):
+                    if candidate not in seen:
+                        seen.add(candidate)
+                        result.append(candidate)
+            return result
+        return strings
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""Microbenchmark for build_become_command in become_plugins/custom_plugin.py.
+
+Compares the current plugin against the previous implementation, which
+called get_option four times and rebuilt every string on each call, and
+prints calls per second for both.  Requires ansible to be importable.
+
+    python utils/become_benchmark.py --calls 100000 --password secret
+"""
+from argparse import ArgumentParser
+import os
+import re
+import time
+
+from ansible.plugins.loader import become_loader, shell_loader
+
+BECOME_PLUGINS = os.path.join(os.path.dirname(os.path.abspath(__file__)), os.pardir, 'become_plugins')
+
+
+def legacy_build_become_command(self, cmd, shell):
+    """build_become_command as it was before the command parts were cached."""
+    super(type(self), self).build_become_command(cmd, shell)
+
+    if not cmd:
+        return cmd
+
+    becomecmd = self.get_option('become_exe') or self.name
+
+    flags = self.get_option('become_flags') or ''
+    prompt = ''
+    if self.get_option('become_pass'):
+        self.prompt = '[custom_plugin via ansible, key=%s] password:' % self._id
+        if flags:
+            flags = flags.replace('-n', '')
+        prompt = '-p "%s"' % (self.prompt)
+
+    user = self.get_option('become_user') or ''
+    if user:
+        user = '-u %s' % (user)
+
+    return ' '.join([becomecmd, flags, prompt, user, self._build_success_command(cmd, shell)])
+
+
+def new_plugin(options):
+    plugin = become_loader.get('custom_plugin')
+    plugin.set_options(direct=options)
+    return plugin
+
+
+def calls_per_second(build, options, shell, calls, fresh):
+    plugin = new_plugin(options)
+    started = time.time()
+    for _ in range(calls):
+        if fresh:
+            plugin = new_plugin(options)
+        build(plugin, 'echo hello', shell)
+    return calls / (time.time() - started)
+
+
+def main():
+    parser = ArgumentParser()
+    parser.add_argument('--calls', type=int, default=50000, help='build_become_command calls per variant')
+    parser.add_argument('--user', default='root', help='become_user to resolve')
+    parser.add_argument('--password', default=None, help='become_pass to resolve (adds the prompt)')
+    parser.add_argument('--fresh', action='store_true', default=False,
+                        help='Load a new plugin instance for every call, as the task executor does per task')
+    args = parser.parse_args()
+
+    become_loader.add_directory(BECOME_PLUGINS)
+    shell = shell_loader.get('sh')
+    options = {'become_user': args.user}
+    if args.password:
+        options['become_pass'] = args.password
+
+    plugin = new_plugin(options)
+    ids = re.compile('[a-z]{32}')
+    if ids.sub('ID', legacy_build_become_command(plugin, 'echo hello', shell)) != \
+            ids.sub('ID', plugin.build_become_command('echo hello', shell)):
+        raise SystemExit('the current plugin builds a different command than the legacy implementation')
+
+    before = calls_per_second(legacy_build_become_command, options, shell, args.calls, args.fresh)
+    after = calls_per_second(type(plugin).build_become_command, options, shell, args.calls, args.fresh)
+    print('before: {:>12,.0f} calls/s'.format(before))
+    print('after:  {:>12,.0f} calls/s'.format(after))
+    print('speedup: {:.2f}x'.format(after / before))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+"""Local runner for the *_benchmark.yml playbooks.
+
+Runs a playbook once for every combination of host count, fork count,
+environment, extra var values and extra ansible-playbook arguments, and
+appends one JSON line per run to a results file so throughput can be
+compared between releases.
+
+Hosts come from inventories/scale_dyn_inventory.py (sized through
+SCALE_INVENTORY_HOSTS) unless --inventory is given.  Each run uses the
+quiet benchmark_events stdout callback from callback_plugins/, which
+counts events; --compare-callback reruns the same combination with a real
+stdout callback and records the difference between the median wall times of
+the --repeat runs of each as callback overhead.
+
+    python utils/benchmark_runner.py event_volume_benchmark.yml \\
+        --hosts 10 100 --forks 5 50 -e event_count=50,500 --compare-callback default --repeat 5
+"""
+from argparse import ArgumentParser
+import itertools
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCALE_INVENTORY = os.path.join(REPO, 'inventories', 'scale_dyn_inventory.py')
+BASELINE_CALLBACK = 'benchmark_events'
+STDOUT_CHUNK = 65536
+MIN_COMPARE_REPEAT = 3
+
+
+def parse_value(value):
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def split_values(values):
+    """Split on the commas that are not inside JSON brackets or quotes."""
+    parts = ['']
+    depth = 0
+    quote = None
+    for char in values:
+        if quote:
+            quote = None if char == quote else quote
+        elif char in '"\'':
+            quote = char
+        elif char in '[{':
+            depth += 1
+        elif char in ']}':
+            depth -= 1
+        elif char == ',' and not depth:
+            parts.append('')
+            continue
+        parts[-1] += char
+    return parts
+
+
+def parse_matrix(assignments, parse=parse_value):
+    """Turn ['a=1,2', 'b=x', 'c=[1,2],[3]'] into [('a', [1, 2]), ('b', ['x']), ('c', [[1, 2], [3]])]."""
+    matrix = []
+    for assignment in assignments:
+        name, sep, values = assignment.partition('=')
+        if not sep:
+            raise SystemExit('matrix values must look like name=value[,value...], got {!r}'.format(assignment))
+        matrix.append((name, [parse(value) for value in split_values(values)]))
+    return matrix
+
+
+def combinations(matrix):
+    names = [name for name, _ in matrix]
+    for values in itertools.product(*[values for _, values in matrix]):
+        yield dict(zip(names, values))
+
+
+def median(values):
+    values = sorted(values)
+    middle = len(values) // 2
+    return values[middle] if len(values) % 2 else (values[middle - 1] + values[middle]) / 2.0
+
+
+def exit_code(status):
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+
+def run_playbook(playbook, inventories, hosts, forks, extra_vars, stdout_callback, playbook_args=(), env=None,
+                 max_custom_stats_bytes=None):
+    """Run ansible-playbook once and return wall time, exit code, peak RSS, stdout size and the event summary."""
+    events_fd, events_path = tempfile.mkstemp(prefix='benchmark_events_', suffix='.json')
+    os.close(events_fd)
+    run_env = os.environ.copy()
+    run_env.update({'SCALE_INVENTORY_HOSTS': str(hosts),
+                    'ANSIBLE_STDOUT_CALLBACK': stdout_callback,
+                    'ANSIBLE_CALLBACK_PLUGINS': os.path.join(REPO, 'callback_plugins'),
+                    'BENCHMARK_EVENTS_FILE': events_path})
+    if max_custom_stats_bytes is not None:
+        # larger artifacts are left out by the callback, before they ever reach the disk
+        run_env['BENCHMARK_MAX_CUSTOM_STATS_BYTES'] = str(max_custom_stats_bytes)
+    run_env.update(env or {})
+    cmd = ['ansible-playbook', '-f', str(forks), '-e', json.dumps(extra_vars)]
+    for inventory in inventories:
+        cmd.extend(['-i', inventory])
+    cmd.extend(playbook_args)
+    cmd.append(playbook)
+
+    stdout_bytes = 0
+    with open(os.devnull, 'rb') as stdin, tempfile.TemporaryFile() as stderr:
+        started = time.time()
+        proc = subprocess.Popen(cmd, stdin=stdin, stdout=subprocess.PIPE, stderr=stderr, env=run_env, cwd=REPO)
+        # count the output instead of keeping it, the runner must not be the one holding it in memory
+        for chunk in iter(lambda: proc.stdout.read(STDOUT_CHUNK), b''):
+            stdout_bytes += len(chunk)
+        proc.stdout.close()
+        # wait4 reports the peak RSS of this run alone, unlike getrusage(RUSAGE_CHILDREN)
+        _, status, rusage = os.wait4(proc.pid, 0)
+        proc.returncode = exit_code(status)
+        wall = time.time() - started
+        stderr.seek(0)
+        errors = stderr.read().decode('utf-8', 'replace')
+
+    try:
+        with open(events_path) as f:
+            summary = json.load(f)
+    except ValueError:
+        summary = {}  # the callback never got to write it, e.g. a parse error
+    finally:
+        os.remove(events_path)
+    return {'rc': proc.returncode, 'wall_seconds': wall, 'max_rss_kb': rusage.ru_maxrss,
+            'stdout_bytes': stdout_bytes, 'summary': summary, 'stderr': errors}
+
+
+def ansible_version():
+    try:
+        output = subprocess.check_output(['ansible', '--version'], stdin=open(os.devnull), stderr=subprocess.STDOUT)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return output.decode('utf-8', 'replace').splitlines()[0]
+
+
+def benchmark(args, on_result=None):
+    """Run every combination and return the result records, appending each to args.results."""
+    playbook = os.path.abspath(args.playbook)
+    inventories = [os.path.abspath(inventory) for inventory in args.inventory]
+    playbook_args = list(args.playbook_args or [''])
+    if args.playbook_args_file:
+        with open(args.playbook_args_file) as f:
+            playbook_args.extend(line.strip() for line in f if line.strip())
+        if not args.playbook_args:
+            playbook_args.remove('')
+    version = ansible_version()
+    records = []
+    for hosts, forks, env, extra_vars, arguments in itertools.product(
+            args.hosts, args.forks, list(combinations(parse_matrix(args.env, str))),
+            list(combinations(parse_matrix(args.extra_vars))), playbook_args):
+        runs = []
+        for repeat in range(args.repeat):
+            run = run_playbook(playbook, inventories, hosts, forks, extra_vars, BASELINE_CALLBACK,
+                               shlex.split(arguments), env, args.max_custom_stats_bytes)
+            compared = None
+            if args.compare_callback:
+                compared = run_playbook(playbook, inventories, hosts, forks, extra_vars, args.compare_callback,
+                                        shlex.split(arguments), env, args.max_custom_stats_bytes)
+            runs.append((repeat, run, compared))
+        if args.compare_callback:
+            # one pair of runs differs by more than the callback costs, the medians of --repeat pairs do not
+            overhead = median([compared['wall_seconds'] for _, _, compared in runs]) \
+                - median([run['wall_seconds'] for _, run, _ in runs])
+        for repeat, run, compared in runs:
+            events = run['summary'].get('events', 0)
+            seconds = run['summary'].get('seconds')
+            # --hosts only sizes inventories that read SCALE_INVENTORY_HOSTS, so record what actually ran
+            record = {'playbook': os.path.relpath(playbook, REPO), 'hosts': run['summary'].get('hosts'),
+                      'scale_inventory_hosts': hosts, 'forks': forks,
+                      'env': env, 'vars': extra_vars, 'playbook_args': arguments,
+                      'repeat': repeat, 'rc': run['rc'],
+                      'wall_seconds': round(run['wall_seconds'], 3),
+                      # the callback starts timing once the inventory is loaded
+                      'startup_seconds': round(run['wall_seconds'] - seconds, 3) if seconds is not None else None,
+                      'events': events,
+                      'events_per_second': round(events / seconds, 1) if seconds else None,
+                      'max_rss_kb': run['max_rss_kb'],
+                      'stdout_bytes': run['stdout_bytes'],
+                      'custom_stats': run['summary'].get('custom_stats', {}),
+                      'custom_stats_bytes': run['summary'].get('custom_stats_bytes', 0),
+                      'custom_stats_dump_seconds': run['summary'].get('custom_stats_dump_seconds'),
+                      'tasks': run['summary'].get('tasks', []),
+                      'ansible': version, 'timestamp': time.time()}
+            if compared:
+                record['callback'] = {'name': args.compare_callback,
+                                      'rc': compared['rc'],
+                                      'wall_seconds': round(compared['wall_seconds'], 3),
+                                      'max_rss_kb': compared['max_rss_kb'],
+                                      'stdout_bytes': compared['stdout_bytes'],
+                                      'stdout_bytes_per_second': round(compared['stdout_bytes']
+                                                                       / compared['wall_seconds']),
+                                      'overhead_runs': len(runs),
+                                      'overhead_seconds': round(overhead, 3),
+                                      'overhead_ms_per_event': round(1000 * overhead / events, 4) if events else None}
+            if run['rc'] not in args.allowed_rc:
+                sys.stderr.write(run['stderr'])
+            if on_result:
+                on_result(record, run)
+            with open(args.results, 'a') as f:
+                f.write(json.dumps(record, sort_keys=True) + '\n')
+            print(format_record(record))
+            records.append(record)
+    return records
+
+
+def format_record(record):
+    env = ''.join('{}={} '.format(name, value) for name, value in sorted(record['env'].items()))
+    playbook_args = ' ' + record['playbook_args'] if record['playbook_args'] else ''
+    line = '{playbook} hosts={hosts} forks={forks} {env}{vars}{playbook_args}: rc={rc} {wall_seconds}s ' \
+           '{events} events ({events_per_second}/s) rss={max_rss_kb}KB'.format(**dict(record, env=env,
+                                                                                      playbook_args=playbook_args))
+    if 'callback' in record:
+        line += ' {name} overhead={overhead_seconds}s ({overhead_ms_per_event}ms/event) ' \
+                'stdout={stdout_bytes}B ({stdout_bytes_per_second}B/s) rss={max_rss_kb}KB'.format(**record['callback'])
+    return line
+
+
+def build_parser():
+    parser = ArgumentParser(description='Run a benchmark playbook over a matrix of sizes and record the results.')
+    parser.add_argument('playbook', help='Playbook to run')
+    parser.add_argument('--inventory', nargs='+', default=[SCALE_INVENTORY],
+                        help='Inventory sources to use (default: inventories/scale_dyn_inventory.py)')
+    parser.add_argument('--hosts', type=int, nargs='+', default=[1],
+                        help='Host counts, passed to the inventory as SCALE_INVENTORY_HOSTS; the hosts '
+                             'recorded are the ones that actually ran, whatever the inventory')
+    parser.add_argument('--forks', type=int, nargs='+', default=[5], help='Fork counts')
+    parser.add_argument('-e', '--extra-vars', action='append', default=[], metavar='NAME=V1[,V2...]',
+                        help='Extra var and the values to try; may be repeated')
+    parser.add_argument('--env', action='append', default=[], metavar='NAME=V1[,V2...]',
+                        help='Environment variable and the values to try, e.g. ANSIBLE_CACHE_PLUGIN; may be repeated')
+    parser.add_argument('--compare-callback', default=None,
+                        help='Also run every combination with this stdout callback and record the overhead, '
+                             'the difference between the median wall times; needs --repeat 3 or more')
+    parser.add_argument('--repeat', type=int, default=1, help='Runs per combination')
+    parser.add_argument('--playbook-args', action='append',
+                        help='Extra ansible-playbook arguments, as one string; may be repeated to try several')
+    parser.add_argument('--playbook-args-file',
+                        help='File with more --playbook-args strings to try, one per line')
+    parser.add_argument('--allowed-rc', type=int, nargs='+', default=[0],
+                        help='Exit codes that count as a successful run (stderr is shown otherwise)')
+    parser.add_argument('--max-custom-stats-bytes', type=int, default=65536,
+                        help='Record custom stats up to this serialised size, larger ones are recorded as null')
+    parser.add_argument('--results', default='benchmark_results.jsonl',
+                        help='JSON lines file the results are appended to')
+    return parser
+
+
+def main():
+    parser = build_parser()
+    args = parser.parse_args()
+    if args.compare_callback and args.repeat < MIN_COMPARE_REPEAT:
+        parser.error('--compare-callback needs --repeat {} or more, single runs differ by more than '
+                     'a callback costs'.format(MIN_COMPARE_REPEAT))
+    benchmark(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""Write a configurable amount of stdout, for output_volume_benchmark.yml.
+
+    python utils/emit_output.py --lines 10000 --line-length 200 --unicode-ratio 0.2 --binary-ratio 0.05
+
+Writes --lines lines of about --line-length bytes each.  --unicode-ratio of
+the lines are CJK text (three bytes per character in UTF-8) and
+--binary-ratio of them bytes that are not valid UTF-8, control characters
+included; the rest are ASCII.  The output is the same for the same --seed,
+and is written in chunks as it is generated so this script never holds it all.
+"""
+from argparse import ArgumentParser
+import random
+import sys
+
+POOL_LINES = 256
+CHUNK_LINES = 256
+
+try:
+    unichr
+except NameError:
+    unichr = chr
+
+
+def ascii_line(rng, length):
+    return ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz0123456789 ') for _ in range(length)).encode('ascii')
+
+
+def unicode_line(rng, length):
+    return u''.join(unichr(rng.randint(0x4e00, 0x9fff)) for _ in range(max(1, length // 3))).encode('utf-8')
+
+
+def binary_line(rng, length):
+    # anything but a newline, weighted towards bytes that cannot start a UTF-8 sequence
+    return bytes(bytearray(rng.choice((rng.randint(0x80, 0xbf), rng.randint(0, 9), rng.randint(11, 0xff)))
+                           for _ in range(length)))
+
+
+def line_pool(line_length, unicode_ratio, binary_ratio, seed):
+    rng = random.Random(seed)
+    pool = []
+    for _ in range(POOL_LINES):
+        kind = rng.random()
+        if kind < binary_ratio:
+            pool.append(binary_line(rng, line_length))
+        elif kind < binary_ratio + unicode_ratio:
+            pool.append(unicode_line(rng, line_length))
+        else:
+            pool.append(ascii_line(rng, line_length))
+    return pool
+
+
+def emit(out, lines, line_length, unicode_ratio, binary_ratio, seed):
+    pool = line_pool(line_length, unicode_ratio, binary_ratio, seed)
+    for start in range(0, lines, CHUNK_LINES):
+        end = min(lines, start + CHUNK_LINES)
+        out.write(b''.join(pool[index % POOL_LINES] + b'\n' for index in range(start, end)))
+    out.flush()
+
+
+def main():
+    parser = ArgumentParser(description='Write a configurable amount of stdout.')
+    parser.add_argument('--lines', type=int, default=100, help='Number of lines')
+    parser.add_argument('--line-length', type=int, default=80, help='Approximate bytes per line')
+    parser.add_argument('--unicode-ratio', type=float, default=0.0, help='Fraction, 0.0 to 1.0, of CJK lines')
+    parser.add_argument('--binary-ratio', type=float, default=0.0,
+                        help='Fraction, 0.0 to 1.0, of lines that are not valid UTF-8')
+    parser.add_argument('--seed', default='emit_output', help='Seed the output is derived from')
+    args = parser.parse_args()
+    if min(args.lines, args.line_length) < 0 or not 0.0 <= args.unicode_ratio + args.binary_ratio <= 1.0 \
+            or min(args.unicode_ratio, args.binary_ratio) < 0.0:
+        parser.error('--lines and --line-length must be non-negative, the ratios between 0.0 and 1.0 together')
+    emit(getattr(sys.stdout, 'buffer', sys.stdout), args.lines, args.line_length, args.unicode_ratio,
+         args.binary_ratio, args.seed)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,28 @@
+"""Output directories for the utils/ generators.
+
+Every generator replaces its output directory on each run.  The directory
+gets a MARKER file when it is created and only a directory holding one is
+ever deleted, so pointing a generator at a checkout or a home directory by
+mistake is an error instead of a wipe.
+"""
+import os
+import shutil
+
+# Hidden, so directory inventory sources skip it
+MARKER = '.benchmark_generated'
+
+
+def replace_generated_dir(output):
+    """Leave ``output`` as an empty, marked directory, deleting it first only if a generator wrote it."""
+    if os.path.isdir(output) and not os.path.islink(output):
+        if os.path.exists(os.path.join(output, MARKER)):
+            shutil.rmtree(output)
+        elif os.listdir(output):
+            raise SystemExit('{} is not empty and was not written by a utils/ generator, '
+                             'remove it yourself or pick another directory'.format(output))
+    elif os.path.lexists(output):
+        raise SystemExit('{} exists and is not a directory'.format(output))
+    if not os.path.isdir(output):
+        os.makedirs(output)
+    with open(os.path.join(output, MARKER), 'w') as f:
+        f.write('written by utils/, deleted and rewritten on the next run\n')
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""Write an inventory directory with sized group_vars and host_vars files.
+
+Used with hostvars_benchmark.yml to see how the size and depth of the vars
+that end up in ``hostvars`` affect controller memory and time:
+
+    python utils/hostvars_inventory.py /tmp/hostvars_inventory --hosts 5000 --groups 50 \\
+        --host-var-bytes 2048 --group-var-bytes 16384 --depth 3
+    python utils/benchmark_runner.py hostvars_benchmark.yml --inventory /tmp/hostvars_inventory
+
+Every host gets a ``host_marker`` var and a ``host_payload`` var of roughly
+--host-var-bytes, nested --depth levels deep with --fanout keys per level;
+every group gets ``group_marker`` and ``group_payload`` the same way.
+"""
+from argparse import ArgumentParser
+import json
+import os
+
+from generated_dir import replace_generated_dir
+from inventory_generator import scale_payload
+
+
+def nested_payload(size, depth, fanout):
+    """Return about ``size`` bytes of strings spread over ``fanout ** depth`` leaves ``depth`` levels deep."""
+    if depth == 0:
+        return scale_payload(size)
+    leaf = nested_payload(size // fanout, depth - 1, fanout)
+    return dict(('level_{}_{}'.format(depth, key), leaf) for key in range(fanout))
+
+
+def dump_vars(path, data, fmt):
+    with open(path, 'w') as f:
+        if fmt == 'json':
+            json.dump(data, f)
+        else:
+            import yaml
+
+            class NoAliasDumper(yaml.SafeDumper):
+                # payload leaves are shared objects; real vars files do not use anchors
+                def ignore_aliases(self, data):
+                    return True
+
+            yaml.dump(data, f, Dumper=NoAliasDumper, default_flow_style=False)
+
+
+def write_inventory(output, hosts, groups, host_var_bytes, group_var_bytes, depth, fanout, fmt):
+    replace_generated_dir(output)
+    os.makedirs(os.path.join(output, 'group_vars'))
+    os.makedirs(os.path.join(output, 'host_vars'))
+    host_name = 'host_{{:0{}d}}'.format(max(2, len(str(hosts - 1)))).format
+    group_name = 'group_{{:0{}d}}'.format(max(2, len(str(groups - 1)))).format
+    extension = '.json' if fmt == 'json' else '.yml'
+
+    host_payload = nested_payload(host_var_bytes, depth, fanout)
+    group_payload = nested_payload(group_var_bytes, depth, fanout)
+    # no .ini extension: directory inventory sources skip .ini files
+    with open(os.path.join(output, 'hosts'), 'w') as f:
+        f.write('[all:vars]\nansible_connection=local\n')
+        for group in range(groups):
+            f.write('\n[{}]\n'.format(group_name(group)))
+            f.writelines(host_name(host) + '\n' for host in range(group, hosts, groups))
+            dump_vars(os.path.join(output, 'group_vars', group_name(group) + extension),
+                      {'group_marker': group, 'group_payload': group_payload}, fmt)
+    for host in range(hosts):
+        dump_vars(os.path.join(output, 'host_vars', host_name(host) + extension),
+                  {'host_marker': host, 'host_payload': host_payload}, fmt)
+
+
+def main():
+    parser = ArgumentParser(description='Write an inventory directory with sized group_vars and host_vars.')
+    parser.add_argument('output', help='Directory to write the inventory to; replaced if an earlier run wrote it')
+    parser.add_argument('--hosts', type=int, default=100, help='Number of hosts')
+    parser.add_argument('--groups', type=int, default=10, help='Number of groups, hosts are spread round-robin')
+    parser.add_argument('--host-var-bytes', type=int, default=1024, help='Approximate size of each host_payload')
+    parser.add_argument('--group-var-bytes', type=int, default=1024, help='Approximate size of each group_payload')
+    parser.add_argument('--depth', type=int, default=2, help='Nesting depth of the payloads')
+    parser.add_argument('--fanout', type=int, default=4, help='Keys per nesting level')
+    parser.add_argument('--format', choices=('yaml', 'json'), default='yaml', help='Format of the vars files')
+    args = parser.parse_args()
+    if args.hosts < 1 or args.groups < 1 or args.fanout < 1 or min(args.depth, args.host_var_bytes,
+                                                                        args.group_var_bytes) < 0:
+        parser.error('--hosts, --groups and --fanout must be positive, the sizes and --depth non-negative')
+    write_inventory(args.output, args.hosts, args.groups, args.host_var_bytes, args.group_var_bytes,
+                    args.depth, args.fanout, args.format)
+
+
+if __name__ == '__main__':
+    main()
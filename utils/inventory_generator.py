@@ -0,0 +1,535 @@
+"""Shared generator behind the inventories/**/dyn_inventory.py scripts.
+
+The scripts all describe the same layout: three groups whose hosts overlap
+pairwise and all together, an ``ungrouped`` range and a marker var on the
+first host of each group.  The layout is built once per parameter set,
+serialized to compact JSON and cached on disk, so repeated ``--list`` calls
+only copy bytes to stdout.
+
+Set ``DYN_INVENTORY_HOSTS_PER_GROUP`` to scale every host range up, and
+``DYN_INVENTORY_CACHE_DIR`` to move the cache somewhere other than
+``~/.cache/dyn_inventory``.  The cache directory is private to the user and
+cache entries owned by anyone else are never read, since an inventory is
+trusted with things like ``ansible_python_interpreter``.
+
+The scale_* functions back inventories/scale_dyn_inventory.py instead: a
+parametric host/group/overlap/nesting layout that is streamed out as JSON
+chunks without ever holding the full inventory in memory.  Its metaless
+mode leaves ``_meta`` out and answers ``--host`` from an indexed hostvar
+file (see write_hostvar_index) with a binary search over a memory map.
+
+The host_status_* functions back inventories/gen_host_status_inventory.py,
+which names hosts after the outcome gen_host_status.yml gives them.
+"""
+from argparse import ArgumentParser
+from array import array
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+
+# Bump whenever the generated layout changes so stale cache entries are ignored
+CACHE_VERSION = 1
+
+ALL_VARS = {'ansible_connection': 'local',
+            'inventories_var': True}
+
+# Chunk size, in hosts, used when streaming the scale inventory
+STREAM_BATCH = 1000
+
+PAYLOAD_ALPHABET = 'abcdefghijklmnopqrstuvwxyz0123456789'
+
+# Outcomes gen_host_status.yml can give a host, keyed off a suffix of its name
+HOST_STATUSES = ('ok', 'skipped', 'changed', 'failed', 'ignored', 'rescued', 'unreachable')
+
+# Hostvar index layout: header, one fixed-width entry per host sorted by name, then
+# the blob of key/value bytes.  Each entry is (offset into blob, key length, value
+# length) and the JSON value immediately follows its key.
+INDEX_MAGIC = b'HVIDX001'
+INDEX_HEADER = struct.Struct('<8sQ')
+INDEX_ENTRY = struct.Struct('<QII')
+
+
+def cache_dir():
+    user_cache = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.environ.get('DYN_INVENTORY_CACHE_DIR', os.path.join(user_cache, 'dyn_inventory'))
+
+
+def owned(st):
+    return st.st_uid == os.getuid()
+
+
+def make_cache_dir(directory):
+    """Create ``directory`` for the current user alone, refusing one that belongs to someone else."""
+    try:
+        os.makedirs(directory, 0o700)
+    except OSError:
+        if not os.path.isdir(directory):
+            raise
+    if not owned(os.stat(directory)):
+        raise OSError('{} belongs to another user'.format(directory))
+
+
+def host_names(prefix, count, start=1):
+    return ['{}_host_{:02d}'.format(prefix, i) for i in range(start, start + count)]
+
+
+def marker_hostvars(labels):
+    """Return the hostvars set on the first host of each group, without building the host ranges."""
+    hostvars = {}
+    for label in labels:
+        marker = host_names('group_{}'.format(label), 1)[0]
+        hostvars[marker] = {'{}_has_this_var'.format(marker): True}
+    return hostvars
+
+
+def overlapping_groups(labels, hosts_per_group=5, ungrouped_start=1, group_vars=None, meta=True):
+    """Return the inventory dict for three overlapping groups named group_<label>.
+
+    Every host range is generated exactly once and shared between the groups
+    it belongs to.  When ``meta`` is false the hostvars are returned as a
+    separate dict instead of being embedded under ``_meta``.
+    """
+    first, second, third = labels
+    group_vars = group_vars or {}
+
+    first_and_second = host_names('group_{}_and_{}'.format(first, second), hosts_per_group)
+    second_and_third = host_names('group_{}_and_{}'.format(second, third), hosts_per_group)
+    all_three = host_names('group_{}_{}_and_{}'.format(first, second, third), hosts_per_group)
+    members = {first: [first_and_second, all_three],
+               second: [first_and_second, second_and_third, all_three],
+               third: [second_and_third, all_three]}
+
+    inventory = {}
+    for label in labels:
+        name = 'group_{}'.format(label)
+        hosts = host_names(name, hosts_per_group)
+        for shared in members[label]:
+            hosts.extend(shared)
+        variables = {'is_in_{}'.format(name): True}
+        variables.update(group_vars.get(label, {}))
+        inventory[name] = {'hosts': hosts, 'vars': variables}
+
+    hostvars = marker_hostvars(labels)
+
+    inventory['all'] = {'vars': dict(ALL_VARS)}
+    inventory['ungrouped'] = {'hosts': host_names('ungrouped', hosts_per_group, ungrouped_start)}
+    if meta:
+        inventory['_meta'] = {'hostvars': hostvars}
+        return inventory, {}
+    return inventory, hostvars
+
+
+def dumps(data):
+    return json.dumps(data, separators=(',', ':'))
+
+
+def cache_key(params):
+    raw = json.dumps([CACHE_VERSION, params], sort_keys=True)
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+
+def write_cache(path, payload):
+    directory = os.path.dirname(path)
+    make_cache_dir(directory)
+    # Write to a sibling temp file first so concurrent readers never see a partial file
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(fd, 'wb') as f:
+        f.write(payload)
+    os.rename(tmp_path, path)
+
+
+def cached_payload(name, params, build, refresh=False):
+    """Return the serialized payload for ``params``, building it only on a cache miss."""
+    path = os.path.join(cache_dir(), '{}-{}.json'.format(name, cache_key(params)))
+    if not refresh:
+        try:
+            with open(path, 'rb') as f:
+                # the entry is checked once open, so it cannot be swapped after the check
+                if owned(os.fstat(f.fileno())):
+                    return f.read()
+        except (IOError, OSError):
+            pass
+    payload = dumps(build()).encode('utf-8')
+    try:
+        write_cache(path, payload)
+    except (IOError, OSError):
+        pass  # an unwritable cache only costs speed
+    return payload
+
+
+def emit(payload):
+    out = getattr(sys.stdout, 'buffer', sys.stdout)
+    out.write(payload)
+    out.write(b'\n')
+    out.flush()
+
+
+def parse_args():
+    parser = ArgumentParser()
+    parser.add_argument('--list', dest='list_instances', action='store_true', default=True,
+                        help='List instances (default: True)')
+    parser.add_argument('--host', dest='requested_host', help='Get all the variables about a specific instance')
+    parser.add_argument('--hosts-per-group', type=int,
+                        default=int(os.environ.get('DYN_INVENTORY_HOSTS_PER_GROUP', 5)),
+                        help='Hosts in each host range (default: $DYN_INVENTORY_HOSTS_PER_GROUP or 5)')
+    parser.add_argument('--refresh-cache', action='store_true', default=False,
+                        help='Rebuild the inventory even if a cached copy exists')
+    return parser.parse_args()
+
+
+def load_inventory(labels, ungrouped_start=1, group_vars=None, meta=True):
+    """Entry point shared by the dyn_inventory.py scripts."""
+    args = parse_args()
+    params = {'labels': list(labels),
+              'hosts_per_group': args.hosts_per_group,
+              'ungrouped_start': ungrouped_start,
+              'group_vars': group_vars or {},
+              'meta': meta}
+
+    def build_inventory():
+        return overlapping_groups(**params)[0]
+
+    if args.requested_host and not meta:
+        hostvars = marker_hostvars(labels)
+        emit(dumps(hostvars.get(args.requested_host, {})).encode('utf-8'))
+    elif args.list_instances:
+        name = 'inventory' if meta else 'metaless'
+        emit(cached_payload(name, params, build_inventory, refresh=args.refresh_cache))
+
+
+def _name_format(prefix, count):
+    return '{}_{{:0{}d}}'.format(prefix, max(2, len(str(count - 1))))
+
+
+def _overlaps(index, ratio):
+    # Spreads exactly round(hosts * ratio) overlapping hosts evenly over the range
+    return int((index + 1) * ratio) > int(index * ratio)
+
+
+def scale_group_hosts(group, hosts, groups, overlap):
+    """Yield the host indexes in ``group``.
+
+    Host i belongs to group i % groups; overlapping hosts also belong to the
+    following group.
+    """
+    for index in range(group, hosts, groups):
+        yield index
+    if groups > 1 and overlap:
+        for index in range((group - 1) % groups, hosts, groups):
+            if _overlaps(index, overlap):
+                yield index
+
+
+def scale_nesting(groups, depth):
+    """Return (level, parent count, branching factor) for each parent level above the leaf groups."""
+    branch = max(2, int(round(groups ** (1.0 / (depth + 1)))))
+    levels = []
+    count = groups
+    for level in range(1, depth + 1):
+        count = (count + branch - 1) // branch
+        levels.append((level, count, branch))
+    return levels
+
+
+def scale_hostvars(index, payload=None):
+    hostvars = {'scale_host_index': index}
+    if payload:
+        hostvars['payload'] = payload
+    return hostvars
+
+
+def scale_payload(size):
+    return (PAYLOAD_ALPHABET * (size // len(PAYLOAD_ALPHABET) + 1))[:size]
+
+
+def _quoted_batches(names):
+    batch = []
+    for name in names:
+        batch.append(name)
+        if len(batch) == STREAM_BATCH:
+            yield '"' + '","'.join(batch) + '"'
+            batch = []
+    if batch:
+        yield '"' + '","'.join(batch) + '"'
+
+
+def _json_list(names):
+    sep = ''
+    for chunk in _quoted_batches(names):
+        yield sep + chunk
+        sep = ','
+
+
+def scale_hostvar_items(hosts, hostvar_bytes=0):
+    """Yield (host name, hostvars JSON) for every scale host, in sorted name order."""
+    host_name = _name_format('host', hosts).format
+    payload = scale_payload(hostvar_bytes)
+    for index in range(hosts):
+        yield host_name(index), dumps(scale_hostvars(index, payload))
+
+
+def scale_inventory_chunks(hosts, groups, overlap=0.0, depth=0, hostvar_bytes=0, meta=True):
+    """Yield the ``--list`` JSON for the scale inventory as a sequence of string chunks.
+
+    Memory use is bounded by STREAM_BATCH regardless of the host count.  With
+    ``meta`` false the ``_meta`` block is left out, so Ansible falls back to
+    one ``--host`` call per host.
+    """
+    host_name = _name_format('host', hosts).format
+    group_name = _name_format('group', groups).format
+
+    yield '{"all":{"vars":' + dumps(ALL_VARS) + '}'
+    for group in range(groups):
+        yield ',"{}":{{"vars":{{"scale_group_index":{}}},"hosts":['.format(group_name(group), group)
+        for chunk in _json_list(host_name(i) for i in scale_group_hosts(group, hosts, groups, overlap)):
+            yield chunk
+        yield ']}'
+
+    child_name, child_count = group_name, groups
+    for level, count, branch in scale_nesting(groups, depth):
+        parent_name = _name_format('nest_{}'.format(level), count).format
+        for parent in range(count):
+            children = range(parent * branch, min((parent + 1) * branch, child_count))
+            yield ',"{}":{{"children":['.format(parent_name(parent))
+            for chunk in _json_list(child_name(i) for i in children):
+                yield chunk
+            yield ']}'
+        child_name, child_count = parent_name, count
+
+    if not meta:
+        yield '}'
+        return
+    yield ',"_meta":{"hostvars":{'
+    batch = []
+    sep = ''
+    for name, value in scale_hostvar_items(hosts, hostvar_bytes):
+        batch.append('"{}":{}'.format(name, value))
+        if len(batch) == STREAM_BATCH:
+            yield sep + ','.join(batch)
+            batch = []
+            sep = ','
+    if batch:
+        yield sep + ','.join(batch)
+    yield '}}}'
+
+
+def write_hostvar_index(path, items, count):
+    """Write ``count`` (name, hostvars JSON) pairs, already sorted by name, as an indexed hostvar file.
+
+    Only the fixed-width entry table is held in memory while writing.
+    """
+    directory = os.path.dirname(path)
+    make_cache_dir(directory)
+    entries = array('Q')
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.seek(INDEX_HEADER.size + count * INDEX_ENTRY.size)
+            offset = 0
+            previous = None
+            for name, value in items:
+                key = name.encode('utf-8')
+                value = value.encode('utf-8')
+                if previous is not None and key <= previous:
+                    raise ValueError('hostvar index keys must be unique and sorted, got {!r} after {!r}'.format(
+                        key, previous))
+                entries.extend((offset, len(key), len(value)))
+                f.write(key)
+                f.write(value)
+                offset += len(key) + len(value)
+                previous = key
+            if len(entries) != 3 * count:
+                raise ValueError('expected {} hostvar entries, got {}'.format(count, len(entries) // 3))
+            f.seek(0)
+            f.write(INDEX_HEADER.pack(INDEX_MAGIC, count))
+            for start in range(0, len(entries), 3 * STREAM_BATCH):
+                chunk = entries[start:start + 3 * STREAM_BATCH]
+                f.write(b''.join(INDEX_ENTRY.pack(*chunk[i:i + 3]) for i in range(0, len(chunk), 3)))
+    except Exception:
+        os.remove(tmp_path)
+        raise
+    os.rename(tmp_path, path)
+
+
+def lookup_hostvar(path, name):
+    """Return the raw hostvars JSON for ``name`` from an indexed hostvar file, or None.
+
+    The file is memory mapped and binary searched, so only O(log n) entries are touched.
+    """
+    key = name.encode('utf-8')
+    with open(path, 'rb') as f:
+        if not owned(os.fstat(f.fileno())):
+            raise ValueError('{} belongs to another user'.format(path))
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+        magic, count = INDEX_HEADER.unpack_from(mm, 0)
+        if magic != INDEX_MAGIC:
+            raise ValueError('{} is not a hostvar index'.format(path))
+        blob = INDEX_HEADER.size + count * INDEX_ENTRY.size
+        low, high = 0, count
+        while low < high:
+            middle = (low + high) // 2
+            offset, key_length, value_length = INDEX_ENTRY.unpack_from(
+                mm, INDEX_HEADER.size + middle * INDEX_ENTRY.size)
+            start = blob + offset
+            probe = mm[start:start + key_length]
+            if probe < key:
+                low = middle + 1
+            elif probe > key:
+                high = middle
+            else:
+                return mm[start + key_length:start + key_length + value_length]
+        return None
+    finally:
+        mm.close()
+
+
+def scale_hostvar_index(hosts, hostvar_bytes, refresh=False):
+    """Return the path of the indexed hostvar file for these parameters, building it if needed."""
+    params = {'hosts': hosts, 'hostvar_bytes': hostvar_bytes}
+    path = os.path.join(cache_dir(), 'scale-hostvars-{}.idx'.format(cache_key(params)))
+    try:
+        # an index written by another user is rebuilt, never read
+        usable = not refresh and owned(os.stat(path))
+    except OSError:
+        usable = False
+    if not usable:
+        write_hostvar_index(path, scale_hostvar_items(hosts, hostvar_bytes), hosts)
+    return path
+
+
+def parse_scale_args():
+    env = os.environ.get
+    parser = ArgumentParser()
+    parser.add_argument('--list', dest='list_instances', action='store_true', default=True,
+                        help='List instances (default: True)')
+    parser.add_argument('--host', dest='requested_host', help='Get all the variables about a specific instance')
+    parser.add_argument('--hosts', type=int, default=int(env('SCALE_INVENTORY_HOSTS', 100)),
+                        help='Number of hosts (default: $SCALE_INVENTORY_HOSTS or 100)')
+    parser.add_argument('--groups', type=int, default=int(env('SCALE_INVENTORY_GROUPS', 10)),
+                        help='Number of leaf groups (default: $SCALE_INVENTORY_GROUPS or 10)')
+    parser.add_argument('--overlap', type=float, default=float(env('SCALE_INVENTORY_OVERLAP', 0.0)),
+                        help='Fraction of hosts that are also in a second group '
+                             '(default: $SCALE_INVENTORY_OVERLAP or 0.0)')
+    parser.add_argument('--depth', type=int, default=int(env('SCALE_INVENTORY_DEPTH', 0)),
+                        help='Levels of parent groups above the leaf groups (default: $SCALE_INVENTORY_DEPTH or 0)')
+    parser.add_argument('--hostvar-bytes', type=int, default=int(env('SCALE_INVENTORY_HOSTVAR_BYTES', 0)),
+                        help='Size of the payload hostvar on every host (default: $SCALE_INVENTORY_HOSTVAR_BYTES or 0)')
+    parser.add_argument('--metaless', action='store_true',
+                        default=env('SCALE_INVENTORY_METALESS', '').lower() in ('1', 'true', 'yes'),
+                        help='Leave out _meta and serve --host from the indexed hostvar file '
+                             '(default: $SCALE_INVENTORY_METALESS or false)')
+    parser.add_argument('--refresh-cache', action='store_true', default=False,
+                        help='Rebuild the indexed hostvar file even if one exists')
+    args = parser.parse_args()
+    if args.hosts < 0 or args.groups < 1 or args.depth < 0 or args.hostvar_bytes < 0:
+        parser.error('--hosts, --depth and --hostvar-bytes must be non-negative and --groups positive')
+    if not 0.0 <= args.overlap <= 1.0:
+        parser.error('--overlap must be between 0.0 and 1.0')
+    return args
+
+
+def load_scale_inventory(meta=None):
+    """Entry point for inventories/scale_dyn_inventory.py and scale_metaless_dyn_inventory.py."""
+    args = parse_scale_args()
+    if meta is None:
+        meta = not args.metaless
+    out = getattr(sys.stdout, 'buffer', sys.stdout)
+    if args.requested_host and not meta:
+        path = scale_hostvar_index(args.hosts, args.hostvar_bytes, refresh=args.refresh_cache)
+        emit(lookup_hostvar(path, args.requested_host) or b'{}')
+    elif args.requested_host:
+        prefix, _, index = args.requested_host.rpartition('_')
+        hostvars = {}
+        if prefix == 'host' and index.isdigit() and int(index) < args.hosts:
+            hostvars = scale_hostvars(int(index), scale_payload(args.hostvar_bytes))
+        emit(dumps(hostvars).encode('utf-8'))
+    elif args.list_instances:
+        if not meta:
+            # Build the index up front so the --host calls that follow are all lookups
+            scale_hostvar_index(args.hosts, args.hostvar_bytes, refresh=args.refresh_cache)
+        chunks = scale_inventory_chunks(args.hosts, args.groups, args.overlap, args.depth, args.hostvar_bytes, meta)
+        for chunk in chunks:
+            out.write(chunk.encode('utf-8'))
+        out.write(b'\n')
+        out.flush()
+
+
+def parse_status_mix(mix):
+    """Turn 'ok=80,failed=20' into {'ok': 80.0, 'failed': 20.0}."""
+    weights = {}
+    for part in mix.split(','):
+        status, sep, weight = part.strip().partition('=')
+        if not sep or status not in HOST_STATUSES:
+            raise ValueError('status mix entries must look like <status>=<weight> with a status from {}, '
+                             'got {!r}'.format(', '.join(HOST_STATUSES), part))
+        weights[status] = float(weight)
+    if any(weight < 0 for weight in weights.values()) or not sum(weights.values()):
+        raise ValueError('status mix weights must be non-negative and not all zero')
+    return weights
+
+
+def status_counts(hosts, weights):
+    """Split ``hosts`` over the weighted statuses, handing leftovers to the largest remainders."""
+    total = sum(weights.values())
+    shares = dict((status, hosts * weight / total) for status, weight in weights.items())
+    counts = dict((status, int(share)) for status, share in shares.items())
+    leftovers = sorted(shares, key=lambda status: (counts[status] - shares[status], status))
+    for status in leftovers[:hosts - sum(counts.values())]:
+        counts[status] += 1
+    return counts
+
+
+def host_status_inventory(hosts, mix):
+    """Return an inventory of ``hosts`` hosts named <index>_<status>, statuses interleaved evenly.
+
+    Each status also gets a status_<status> group.  No connection vars are set,
+    so only the unreachable hosts ever need a connection.
+    """
+    counts = status_counts(hosts, mix)
+    positions = sorted(((k + 0.5) / count, status)
+                       for status, count in counts.items() for k in range(count))
+    host_name = '{{:0{}d}}_{{}}'.format(max(2, len(str(hosts)))).format
+    inventory = dict(('status_{}'.format(status), {'hosts': []}) for status, count in counts.items() if count)
+    for index, (_, status) in enumerate(positions, 1):
+        inventory['status_{}'.format(status)]['hosts'].append(host_name(index, status))
+    inventory['_meta'] = {'hostvars': {}}
+    return inventory
+
+
+def parse_host_status_args():
+    parser = ArgumentParser()
+    parser.add_argument('--list', dest='list_instances', action='store_true', default=True,
+                        help='List instances (default: True)')
+    parser.add_argument('--host', dest='requested_host', help='Get all the variables about a specific instance')
+    parser.add_argument('--hosts', type=int, default=int(os.environ.get('SCALE_INVENTORY_HOSTS', len(HOST_STATUSES))),
+                        help='Number of hosts (default: $SCALE_INVENTORY_HOSTS or one per status)')
+    parser.add_argument('--mix', default=os.environ.get('HOST_STATUS_MIX', ','.join(
+                        '{}=1'.format(status) for status in HOST_STATUSES)),
+                        help='Relative weight of each status, e.g. ok=90,failed=5,unreachable=5 '
+                             '(default: $HOST_STATUS_MIX or an equal mix)')
+    parser.add_argument('--refresh-cache', action='store_true', default=False,
+                        help='Rebuild the inventory even if a cached copy exists')
+    args = parser.parse_args()
+    if args.hosts < 0:
+        parser.error('--hosts must not be negative')
+    try:
+        args.mix = parse_status_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    return args
+
+
+def load_host_status_inventory():
+    """Entry point for inventories/gen_host_status_inventory.py."""
+    args = parse_host_status_args()
+    if args.requested_host:
+        emit(b'{}')
+    elif args.list_instances:
+        params = {'hosts': args.hosts, 'mix': args.mix}
+        emit(cached_payload('host-status', params, lambda: host_status_inventory(args.hosts, args.mix),
+                            refresh=args.refresh_cache))
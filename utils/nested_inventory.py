@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""Write a tree of inventory sources like inventories/more_inventories/even_more_inventories.
+
+The tree goes in inventory/.  Every directory in it holds a static ``hosts`` file, an executable
+``dyn_inventory.py``, group_vars and host_vars, and --width subdirectories,
+--depth levels deep.  Used with nested_inventory_benchmark.yml to profile
+how inventory sources are merged and how conflicting variables are resolved:
+
+    python utils/nested_inventory.py /tmp/nested_inventory --depth 3 --width 2 --hosts 200 --overlap 0.5
+    python utils/benchmark_runner.py nested_inventory_benchmark.yml --inventory $(cat /tmp/nested_inventory/sources)
+
+``sources``, next to inventory/, lists every static file and script, parents
+before children, as separate inventory sources; passing just inventory/
+instead parses every source in the tree too, but only loads the top
+group_vars/host_vars.
+The static files have no .ini extension because directory sources skip .ini
+files.
+
+Each source has --hosts hosts in --groups groups.  An --overlap fraction of
+both are shared by every source (shared_host_NNNN in shared_group_NN), the
+rest are unique to the source.  Every source and directory sets the same
+variables on them to its own name, so each of these has a winner to find:
+
+    conflict_inline      group vars in the source, and the shared_parent group's
+    conflict_parent      value overridden by each shared_group_NN child
+    conflict_host_inline host vars in the source
+    conflict_group_vars  group_vars/<group>.yml
+    conflict_all         group_vars/all.yml
+    conflict_host_vars   host_vars/<host>.yml of the shared hosts
+"""
+from argparse import ArgumentParser
+import json
+import os
+import stat
+
+from generated_dir import replace_generated_dir
+
+DYN_INVENTORY = '''#!/usr/bin/env python
+import sys
+
+INVENTORY = {!r}
+
+if __name__ == '__main__':
+    sys.stdout.write('{{}}' if '--host' in sys.argv else INVENTORY)
+'''
+
+
+def source_layout(source, hosts, groups, overlap):
+    """Return {group: [hosts]} for one source, shared groups and hosts first."""
+    shared_hosts = int(round(hosts * overlap))
+    shared_groups = int(round(groups * overlap))
+    host_names = ['shared_host_{:04d}'.format(index) for index in range(shared_hosts)]
+    host_names += ['{}_host_{:04d}'.format(source, index) for index in range(hosts - shared_hosts)]
+    group_names = ['shared_group_{:02d}'.format(index) for index in range(shared_groups)]
+    group_names += ['{}_group_{:02d}'.format(source, index) for index in range(groups - shared_groups)]
+    layout = dict((group, []) for group in group_names)
+    for index, host in enumerate(host_names):
+        # shared hosts land in shared groups wherever there are any
+        pool = shared_groups if index < shared_hosts and shared_groups else len(group_names)
+        layout[group_names[index % pool]].append(host)
+    return layout
+
+
+def static_inventory(source, layout):
+    lines = ['[all:vars]', 'ansible_connection=local', '',
+             '[shared_parent:vars]', 'conflict_parent={}'.format(source), '',
+             '[shared_parent:children]']
+    lines.extend(group for group in layout if group.startswith('shared_'))
+    for group, members in sorted(layout.items()):
+        lines.extend(['', '[{}]'.format(group)])
+        lines.extend('{} conflict_host_inline={}'.format(host, source) for host in members)
+        lines.extend(['', '[{}:vars]'.format(group), 'conflict_inline={}'.format(source)])
+        if group.startswith('shared_'):
+            lines.append('conflict_parent={}'.format(source))
+    return '\n'.join(lines) + '\n'
+
+
+def dynamic_inventory(source, layout):
+    inventory = {'all': {'vars': {'ansible_connection': 'local'}},
+                 'shared_parent': {'children': [group for group in layout if group.startswith('shared_')],
+                                   'vars': {'conflict_parent': source}},
+                 '_meta': {'hostvars': {}}}
+    for group, members in layout.items():
+        group_vars = {'conflict_inline': source}
+        if group.startswith('shared_'):
+            group_vars['conflict_parent'] = source
+        inventory[group] = {'hosts': members, 'vars': group_vars}
+        for host in members:
+            inventory['_meta']['hostvars'][host] = {'conflict_host_inline': source}
+    return DYN_INVENTORY.format(json.dumps(inventory, separators=(',', ':')))
+
+
+def write_vars(directory, name, data):
+    with open(os.path.join(directory, name + '.yml'), 'w') as f:
+        json.dump(data, f)  # JSON is YAML
+        f.write('\n')
+
+
+def write_node(output, path, depth, width, hosts, groups, overlap, sources):
+    """Write one directory of the tree and its children, appending its sources to ``sources``."""
+    name = 'level{}'.format(len(path)) + ''.join('_{}'.format(index) for index in path)
+    directory = os.path.join(output, *['child_{}'.format(index) for index in path])
+    for subdirectory in ('group_vars', 'host_vars'):
+        os.makedirs(os.path.join(directory, subdirectory))
+
+    static_name, dyn_name = name + '_static', name + '_dyn'
+    static_layout = source_layout(static_name, hosts, groups, overlap)
+    dyn_layout = source_layout(dyn_name, hosts, groups, overlap)
+    static_path = os.path.join(directory, 'hosts')
+    dyn_path = os.path.join(directory, 'dyn_inventory.py')
+    with open(static_path, 'w') as f:
+        f.write(static_inventory(static_name, static_layout))
+    with open(dyn_path, 'w') as f:
+        f.write(dynamic_inventory(dyn_name, dyn_layout))
+    os.chmod(dyn_path, os.stat(dyn_path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    sources.extend([static_path, dyn_path])
+
+    write_vars(os.path.join(directory, 'group_vars'), 'all', {'conflict_all': name})
+    for group in set(static_layout) | set(dyn_layout):
+        write_vars(os.path.join(directory, 'group_vars'), group, {'conflict_group_vars': name})
+    shared_hosts = set(host for members in static_layout.values() for host in members if host.startswith('shared_'))
+    for host in shared_hosts:
+        write_vars(os.path.join(directory, 'host_vars'), host, {'conflict_host_vars': name})
+
+    if depth > 1:
+        for index in range(width):
+            write_node(output, path + (index,), depth - 1, width, hosts, groups, overlap, sources)
+
+
+def write_tree(output, depth, width, hosts, groups, overlap):
+    replace_generated_dir(output)
+    sources = []
+    write_node(os.path.join(output, 'inventory'), (), depth, width, hosts, groups, overlap, sources)
+    with open(os.path.join(output, 'sources'), 'w') as f:
+        f.write('\n'.join(sources) + '\n')
+    return sources
+
+
+def main():
+    parser = ArgumentParser(description='Write a tree of inventory sources with conflicting variables.')
+    parser.add_argument('output', help='Directory to write the tree to; replaced if an earlier run wrote it')
+    parser.add_argument('--depth', type=int, default=3, help='Levels of nested directories')
+    parser.add_argument('--width', type=int, default=1, help='Subdirectories in every directory but the deepest')
+    parser.add_argument('--hosts', type=int, default=50, help='Hosts in every source')
+    parser.add_argument('--groups', type=int, default=5, help='Groups in every source')
+    parser.add_argument('--overlap', type=float, default=0.5,
+                        help='Fraction, 0.0 to 1.0, of hosts and groups shared by every source')
+    args = parser.parse_args()
+    if min(args.depth, args.width, args.groups) < 1 or args.hosts < 0 or not 0.0 <= args.overlap <= 1.0:
+        parser.error('--depth, --width and --groups must be positive, --hosts non-negative '
+                     'and --overlap between 0.0 and 1.0')
+    sources = write_tree(args.output, args.depth, args.width, args.hosts, args.groups, args.overlap)
+    print('{} sources in {}'.format(len(sources), os.path.join(args.output, 'sources')))
+
+
+if __name__ == '__main__':
+    main()
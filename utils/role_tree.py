@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+"""Write a tree of generated roles, playbooks using them and tag expressions to select from them.
+
+A scaled up roles/test_tag_role and test_tags.yml, used with
+role_tags_benchmark.yml to see what play compilation and tag filtering cost
+on their own:
+
+    python utils/role_tree.py /tmp/role_tree --roles 100 --tasks 50 --tags-per-task 3
+    python utils/benchmark_runner.py role_tags_benchmark.yml -e role_tree=/tmp/role_tree \\
+        -e role_tree_play=roles,import_role,include_role --playbook-args-file /tmp/role_tree/tag_expressions
+
+Every role tag_role_NNN gets --tasks debug tasks, each tagged with
+--tags-per-task of the tag_NN tags out of --tag-pool, and every
+--always-every'th one with always as well.  The playbooks apply every role,
+tagged role_tag_NNN, in one play:
+
+    roles_play.yml         roles:
+    import_role_play.yml   import_role tasks
+    include_role_play.yml  include_role tasks, with the role tag applied inside
+
+tag_expressions has one set of ansible-playbook arguments per line, mostly
+--list-tasks with assorted --tags and --skip-tags, which parse and filter the
+play without running it.
+"""
+from argparse import ArgumentParser
+import json
+import os
+
+from generated_dir import replace_generated_dir
+
+PLAY = '''---
+- name: Generated roles
+  hosts: localhost
+  connection: local
+  gather_facts: false
+'''
+
+
+def tag_name(index):
+    return 'tag_{:02d}'.format(index)
+
+
+def role_name(index):
+    return 'tag_role_{:03d}'.format(index)
+
+
+def role_tasks(role, tasks, tags_per_task, tag_pool, always_every):
+    lines = ['---']
+    for task in range(tasks):
+        # spread the tags so every tag is used by every role
+        tags = [tag_name((task * tags_per_task + offset) % tag_pool) for offset in range(tags_per_task)]
+        if always_every and task % always_every == always_every - 1:
+            tags.append('always')
+        lines.extend(['- name: {} task {:03d}'.format(role, task),
+                      '  debug:',
+                      '    msg: {} task {:03d}'.format(role, task),
+                      '  tags: {}'.format(json.dumps(sorted(set(tags))))])
+    return '\n'.join(lines) + '\n'
+
+
+def playbooks(roles):
+    names = [role_name(index) for index in range(roles)]
+    role_tags = ['role_tag_{:03d}'.format(index) for index in range(roles)]
+    yield 'roles_play.yml', PLAY + '  roles:\n' + ''.join(
+        '    - {{role: {}, tags: [{}]}}\n'.format(name, tag) for name, tag in zip(names, role_tags))
+    yield 'import_role_play.yml', PLAY + '  tasks:\n' + ''.join(
+        '    - import_role:\n        name: {}\n      tags: [{}]\n'.format(name, tag)
+        for name, tag in zip(names, role_tags))
+    yield 'include_role_play.yml', PLAY + '  tasks:\n' + ''.join(
+        '    - include_role:\n        name: {}\n        apply:\n          tags: [{}]\n      tags: [{}]\n'.format(
+            name, tag, tag) for name, tag in zip(names, role_tags))
+
+
+def tag_expressions(roles, tag_pool):
+    few = ','.join(tag_name(index) for index in range(min(2, tag_pool)))
+    half = ','.join(tag_name(index) for index in range(0, tag_pool, 2))
+    return ['--list-tasks',
+            '--list-tasks --tags {}'.format(tag_name(0)),
+            '--list-tasks --tags {}'.format(few),
+            '--list-tasks --tags {}'.format(half),
+            '--list-tasks --skip-tags {}'.format(tag_name(0)),
+            '--list-tasks --skip-tags {}'.format(half),
+            '--list-tasks --tags role_tag_{:03d}'.format(roles - 1),
+            '--list-tasks --tags no_such_tag',
+            '--list-tags',
+            '--tags role_tag_000']
+
+
+def write_tree(output, roles, tasks, tags_per_task, tag_pool, always_every):
+    replace_generated_dir(output)
+    for index in range(roles):
+        role = role_name(index)
+        directory = os.path.join(output, 'roles', role, 'tasks')
+        os.makedirs(directory)
+        with open(os.path.join(directory, 'main.yml'), 'w') as f:
+            f.write(role_tasks(role, tasks, tags_per_task, tag_pool, always_every))
+    for name, content in playbooks(roles):
+        with open(os.path.join(output, name), 'w') as f:
+            f.write(content)
+    with open(os.path.join(output, 'tag_expressions'), 'w') as f:
+        f.write('\n'.join(tag_expressions(roles, tag_pool)) + '\n')
+
+
+def main():
+    parser = ArgumentParser(description='Write generated roles, playbooks using them and tag expressions.')
+    parser.add_argument('output', help='Directory to write the tree to; replaced if an earlier run wrote it')
+    parser.add_argument('--roles', type=int, default=20, help='Number of roles')
+    parser.add_argument('--tasks', type=int, default=50, help='Tasks in every role')
+    parser.add_argument('--tags-per-task', type=int, default=2, help='Tags on every task')
+    parser.add_argument('--tag-pool', type=int, default=20, help='Number of distinct tags')
+    parser.add_argument('--always-every', type=int, default=10,
+                        help='Tag every Nth task with always as well; 0 for none')
+    args = parser.parse_args()
+    if min(args.roles, args.tag_pool) < 1 or min(args.tasks, args.tags_per_task, args.always_every) < 0:
+        parser.error('--roles and --tag-pool must be positive, the other counts non-negative')
+    write_tree(args.output, args.roles, args.tasks, args.tags_per_task, args.tag_pool, args.always_every)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+"""Write an inventory directory full of vaulted variables.
+
+Used with vault_benchmark.yml to see how vault decryption cost scales with
+the number of vaulted variables, vault IDs and hosts:
+
+    python utils/vault_inventory.py /tmp/vault_inventory --hosts 100 --vars 300 --vault-ids 3
+    python utils/benchmark_runner.py vault_benchmark.yml --inventory /tmp/vault_inventory/inventory \\
+        --playbook-args "$(cat /tmp/vault_inventory/vault_ids)"
+
+The inventory goes in inventory/, next to the files that must not be parsed
+as part of it.  The --vars variables are dealt round-robin over
+group_vars/all.yml (vault_group_NNNN), every host's host_vars file
+(vault_host_NNNN) and vault_inline_vars.yml (vault_inline_NNNN), which the
+playbook loads with include_vars.  Variable N is encrypted with vault ID vault_id_<N % --vault-ids>
+as an inline !vault string, as in multivault.yml; with --encrypt-files the
+host_vars files are encrypted whole with the first vault ID instead, as in
+vaulted_ansible_env.yml.  The passwords are written to vault_passwords/ and
+the matching --vault-id arguments to vault_ids.
+
+Every variable is encrypted once and the ciphertext is reused for every host:
+decrypting costs the same either way, encrypting thousands of copies does not.
+"""
+from argparse import ArgumentParser
+import json
+import os
+
+from ansible.module_utils._text import to_bytes, to_text
+from ansible.parsing.vault import VaultLib, VaultSecret
+
+from generated_dir import replace_generated_dir
+from inventory_generator import scale_payload
+
+LOCATIONS = ('group', 'host', 'inline')
+
+
+def vault_ids(count):
+    return ['vault_id_{}'.format(index) for index in range(count)]
+
+
+def vaulted_yaml(vault, variables):
+    """Return YAML with every (name, plaintext, vault ID) in ``variables`` as an inline !vault string."""
+    lines = ['---']
+    for name, plaintext, vault_id in variables:
+        ciphertext = to_text(vault.encrypt(plaintext, vault_id=vault_id))
+        lines.append('{}: !vault |'.format(name))
+        lines.extend('  ' + line for line in ciphertext.splitlines())
+    return '\n'.join(lines) + '\n'
+
+
+def plain_yaml(variables):
+    return '---\n' + ''.join('{}: {}\n'.format(name, json.dumps(plaintext)) for name, plaintext, _ in variables)
+
+
+def write_inventory(output, hosts, variables, ids, value_bytes, encrypt_files):
+    replace_generated_dir(output)
+    inventory = os.path.join(output, 'inventory')
+    for directory in (os.path.join(inventory, 'group_vars'), os.path.join(inventory, 'host_vars'),
+                      os.path.join(output, 'vault_passwords')):
+        os.makedirs(directory)
+    host_name = 'host_{{:0{}d}}'.format(max(2, len(str(hosts - 1)))).format
+
+    secrets = []
+    vault_id_args = []
+    for vault_id in ids:
+        password = 'secret_' + vault_id
+        path = os.path.join(output, 'vault_passwords', vault_id)
+        with open(path, 'w') as f:
+            f.write(password + '\n')
+        secrets.append((vault_id, VaultSecret(to_bytes(password))))
+        vault_id_args.append('--vault-id {}@{}'.format(vault_id, path))
+    vault = VaultLib(secrets)
+    with open(os.path.join(output, 'vault_ids'), 'w') as f:
+        f.write(' '.join(vault_id_args) + '\n')
+
+    by_location = dict((location, []) for location in LOCATIONS)
+    for index in range(variables):
+        location = LOCATIONS[index % len(LOCATIONS)]
+        by_location[location].append(('vault_{}_{:04d}'.format(location, index), scale_payload(value_bytes),
+                                      ids[index % len(ids)]))
+
+    with open(os.path.join(inventory, 'hosts'), 'w') as f:
+        f.write('[all:vars]\nansible_connection=local\n\n[vaulted]\n')
+        f.writelines(host_name(host) + '\n' for host in range(hosts))
+    with open(os.path.join(inventory, 'group_vars', 'all.yml'), 'w') as f:
+        f.write(vaulted_yaml(vault, by_location['group']))
+    with open(os.path.join(output, 'vault_inline_vars.yml'), 'w') as f:
+        f.write(vaulted_yaml(vault, by_location['inline']))
+
+    if encrypt_files:
+        host_vars = to_text(vault.encrypt(plain_yaml(by_location['host']), vault_id=ids[0]))
+    else:
+        host_vars = vaulted_yaml(vault, by_location['host'])
+    for host in range(hosts):
+        with open(os.path.join(inventory, 'host_vars', host_name(host) + '.yml'), 'w') as f:
+            f.write(host_vars)
+
+
+def main():
+    parser = ArgumentParser(description='Write an inventory directory full of vaulted variables.')
+    parser.add_argument('output', help='Directory to write the inventory to; replaced if an earlier run wrote it')
+    parser.add_argument('--hosts', type=int, default=10, help='Number of hosts')
+    parser.add_argument('--vars', type=int, default=30,
+                        help='Number of vaulted variables, spread over group_vars, host_vars and inline vars')
+    parser.add_argument('--vault-ids', type=int, default=2, help='Number of vault IDs the variables are spread over')
+    parser.add_argument('--value-bytes', type=int, default=32, help='Size of each plaintext value')
+    parser.add_argument('--encrypt-files', action='store_true',
+                        help='Encrypt the host_vars files whole instead of their values inline')
+    args = parser.parse_args()
+    if min(args.hosts, args.vault_ids) < 1 or min(args.vars, args.value_bytes) < 0:
+        parser.error('--hosts and --vault-ids must be positive, --vars and --value-bytes non-negative')
+    write_inventory(args.output, args.hosts, args.vars, vault_ids(args.vault_ids), args.value_bytes,
+                    args.encrypt_files)
+
+
+if __name__ == '__main__':
+    main()